@@ -1,15 +1,37 @@
-from flask import Flask, render_template, request, jsonify, send_file, session, redirect, url_for
+from flask import Flask, render_template, request, jsonify, send_file, session, redirect, url_for, Response, stream_with_context
 from flask_babel import Babel, gettext, get_locale
-import yt_dlp
 import os
 import re
+import json
 import time
+import queue
 import uuid
+import secrets
+import shutil
 import logging
+import copy
+import io
+import hashlib
+import functools
+import itertools
 import threading
+import subprocess
+import types
+import multiprocessing
+from operator import itemgetter
 from pathlib import Path
+from urllib.parse import quote
+from werkzeug.utils import safe_join
 from resource_manager import ResourceManager
 import concurrent.futures
+from collections import OrderedDict
+
+# orjson is a C extension and much faster than json for the progress/listing payloads
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Import SenseVoice transcription
 try:
@@ -18,6 +40,7 @@ try:
         transcribe_with_sensevoice,
         transcribe_with_sensevoice_streaming,
         transcribe_with_sensevoice_from_array,
+        transcribe_with_sensevoice_batch_from_array,
         get_sensevoice_status,
         set_preloaded_sensevoice_model
     )
@@ -39,10 +62,28 @@ WHISPER_AVAILABLE = True
 # Pre-load models on startup
 PRELOADED_WHISPER = None
 PRELOADED_SENSEVOICE = None
+whisper_model_lock = threading.Lock()  # one model load at a time, shared by preload and requests
+
+def get_whisper_transcriber():
+    """Return the process-wide Whisper 'small' transcriber, loading it on first use.
+    
+    Requests that arrive while the background preload is still running wait for
+    it instead of loading a second copy of the model.
+    """
+    global PRELOADED_WHISPER
+    if PRELOADED_WHISPER is not None:
+        return PRELOADED_WHISPER
+    with whisper_model_lock:
+        if PRELOADED_WHISPER is None:
+            transcriber = WhisperTranscriber(model_size="small")
+            if transcriber.model is None:
+                raise RuntimeError("Whisper model failed to load")
+            PRELOADED_WHISPER = transcriber
+    return PRELOADED_WHISPER
 
 def preload_models():
     """Pre-load transcription models to reduce initial transcription delay"""
-    global PRELOADED_WHISPER, PRELOADED_SENSEVOICE
+    global PRELOADED_SENSEVOICE
     
     logging.info("=== MODEL PRELOADING STARTED ===")
     
@@ -60,9 +101,8 @@ def preload_models():
                 else:
                     logging.warning(f"⚠ Whisper cache directory does not exist: {whisper_cache}")
             
-            import time
             start_time = time.time()
-            PRELOADED_WHISPER = WhisperTranscriber(model_size="small")
+            get_whisper_transcriber()
             load_time = time.time() - start_time
             logging.info(f"Whisper 'small' model pre-loaded successfully in {load_time:.2f} seconds")
             
@@ -93,19 +133,19 @@ def preload_models():
         except Exception as e:
             logging.warning(f"Failed to pre-load SenseVoice model: {e}")
 
-try:
-    from pydub import AudioSegment
-    PYDUB_AVAILABLE = True
-except ImportError:
-    PYDUB_AVAILABLE = False
-    logging.warning("pydub not available - audio conversion will be limited")
-
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production')
 
+# Root of all per-user download folders, resolved once
+DOWNLOADS_ROOT = Path(os.environ.get('DOWNLOADS_DIR', 'downloads')).resolve()
+
+# Server-side caches, kept out of DOWNLOADS_ROOT so ResourceManager's per-user
+# cleanup and disk quota never see them
+CACHE_ROOT = Path(os.environ.get('CACHE_DIR', 'cache')).resolve()
+
 # Pre-load models when module is imported (for WSGI servers)
 # This ensures models are loaded even when not running as __main__
 # Load in background thread to not block the app startup and healthcheck
@@ -163,6 +203,11 @@ def after_request(response):
     # Add cache headers for static files
     if request.endpoint == 'static':
         response.cache_control.max_age = 31536000  # 1 year
+    elif request.endpoint == 'serve_sw':
+        # Browsers poll the service worker for updates; let them revalidate with a 304
+        response.cache_control.max_age = 0
+        response.cache_control.no_cache = True
+        response.headers['Service-Worker-Allowed'] = '/'
     else:
         response.cache_control.max_age = 300  # 5 minutes for dynamic content
     
@@ -173,33 +218,330 @@ def after_request(response):
     
     return response
 
-# Store download progress and user files
+# Let nginx serve finished files via X-Accel-Redirect instead of streaming them through Python
+X_ACCEL_DOWNLOADS = os.environ.get('X_ACCEL_DOWNLOADS', '').lower() in ('1', 'true', 'yes')
+
+# Optional Redis backend so progress and file lists are shared across gunicorn workers
+REDIS_URL = os.environ.get('REDIS_URL')
+PROGRESS_TTL = 3600  # seconds
+USER_FILES_TTL = 24 * 3600  # matches ResourceManager.max_file_age_hours
+redis_client = None
+if REDIS_URL:
+    try:
+        import redis
+        redis_client = redis.Redis.from_url(REDIS_URL)
+        redis_client.ping()
+        logging.info("Using Redis for shared download state")
+    except Exception as e:
+        logging.warning(f"Redis not available, keeping download state in memory: {e}")
+        redis_client = None
+
+# Store download progress and user files. Both are capped so a long-running
+# process can't grow them without bound; evicted file indexes are rebuilt from
+# disk on next use, evicted progress is the stalest and already past caring.
+MAX_TRACKED_DOWNLOADS = 10000
+MAX_INDEXED_USERS = 10000
 download_progress = {}
-user_downloads = {}  # session_id -> list of files
-progress_timestamps = {}  # track when progress was last updated
+user_downloads = OrderedDict()  # session_id -> {filename: file info}, least recently used first
+user_downloads_lock = threading.Lock()
+user_downloads_generation = {}  # session_id -> generation of its index, dropped along with it on eviction
+# One process-wide counter, so a user re-indexed after eviction never reuses an
+# earlier generation (and with it a stale render_downloads_listing entry)
+user_downloads_generations = itertools.count(1)
+progress_timestamps = OrderedDict()  # track when progress was last updated, oldest first
+progress_lock = threading.Lock()  # guards download_progress/progress_timestamps against cleanup iterating mid-update
+progress_queues = {}  # download_id -> queue.Queue of updates for SSE listeners
+
+# Bounded worker pool for downloads instead of a new thread per request
+DOWNLOAD_WORKERS = int(os.environ.get('DL_WORKERS', 4))
+DOWNLOAD_QUEUE_LIMIT = int(os.environ.get('DL_QUEUE_LIMIT', DOWNLOAD_WORKERS * 4))
+DOWNLOAD_TIMEOUT = 180  # seconds a single download may run
+# DL_PROCESSES runs downloads in forked worker processes so yt-dlp's Python-side
+# work (format probing, remuxing) isn't serialized on this process's GIL. Workers
+# can only report back through Redis, so this requires REDIS_URL.
+DOWNLOAD_PROCESSES = os.environ.get('DL_PROCESSES', '').lower() in ('1', 'true', 'yes')
+if DOWNLOAD_PROCESSES and redis_client is None:
+    logging.warning("DL_PROCESSES requires REDIS_URL, running downloads in threads")
+    DOWNLOAD_PROCESSES = False
+
+def _create_download_pool():
+    if DOWNLOAD_PROCESSES:
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=DOWNLOAD_WORKERS,
+            mp_context=multiprocessing.get_context('fork')
+        )
+    return concurrent.futures.ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix='ytdl')
+
+DOWNLOAD_POOL = _create_download_pool()
+download_pool_lock = threading.Lock()  # guards replacing a broken DOWNLOAD_POOL
+pending_downloads = 0  # running + queued downloads
+pending_downloads_lock = threading.Lock()
+
+# Optional Celery queue: with CELERY_BROKER_URL set, /download enqueues work for
+# separate `celery -A app.celery worker` processes (possibly on other hosts)
+# instead of the local pool. Progress comes back through Redis.
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL')
+celery = None
+if CELERY_BROKER_URL:
+    if redis_client is None:
+        logging.warning("CELERY_BROKER_URL requires REDIS_URL for progress, using the local download pool")
+    else:
+        try:
+            from celery import Celery
+            celery = Celery(app.name, broker=CELERY_BROKER_URL)
+            celery.conf.task_ignore_result = True  # progress lives in Redis, not the result backend
+            celery.conf.task_acks_late = True  # requeue downloads lost to a worker crash
+            celery.conf.worker_prefetch_multiplier = 1  # downloads are long, don't hoard them
+            logging.info("Using Celery for downloads")
+        except ImportError as e:
+            logging.warning(f"Celery not available, using the local download pool: {e}")
+
+# Downloads running outside this process only report progress through Redis
+DOWNLOADS_OUT_OF_PROCESS = DOWNLOAD_PROCESSES or celery is not None
+
+# Celery downloads never pass through this process's ResourceManager, so the
+# per-user concurrency cap is counted in Redis for them
+CELERY_ACTIVE_TTL = 3600  # forget counts left behind by workers that died mid-download
+
+def reserve_celery_download_slot(user_id):
+    """Count a Celery download against the user's limit; False if they're at it"""
+    if resource_manager is None:
+        return True
+    key = f'active_downloads:{user_id}'
+    try:
+        pipe = redis_client.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, CELERY_ACTIVE_TTL)
+        active, _ = pipe.execute()
+        if active > resource_manager.max_concurrent_downloads:
+            redis_client.decr(key)
+            logging.warning(f"User {user_id} exceeded concurrent download limit ({active - 1}/{resource_manager.max_concurrent_downloads})")
+            return False
+    except Exception as e:
+        logging.warning(f"Failed to count active downloads for {user_id}: {e}")
+    return True
+
+def release_celery_download_slot(user_id):
+    if resource_manager is None:
+        return
+    try:
+        redis_client.decr(f'active_downloads:{user_id}')
+    except Exception as e:
+        logging.warning(f"Failed to release active download for {user_id}: {e}")
+
+def _download_done(user_id, future):
+    """Pool callback: release the download's slot in the queue"""
+    global pending_downloads
+    with pending_downloads_lock:
+        pending_downloads -= 1
+    
+    # Runs in this process even when the download ran in a worker process
+    if resource_manager:
+        resource_manager.finish_download(user_id)
+
+def submit_download(*args):
+    """Queue download_video(*args) on DOWNLOAD_POOL, replacing the pool if it broke.
+    
+    A process pool is unusable for good once one of its workers dies (e.g. an
+    OOM kill during yt-dlp or ffmpeg); its queued jobs fail on their own, and
+    new ones go to a fresh pool.
+    """
+    global DOWNLOAD_POOL
+    pool = DOWNLOAD_POOL
+    try:
+        return pool.submit(download_video, *args)
+    except concurrent.futures.BrokenExecutor:
+        with download_pool_lock:
+            if DOWNLOAD_POOL is pool:
+                logging.error("Download worker pool is broken, starting a new one")
+                pool.shutdown(wait=False)
+                DOWNLOAD_POOL = _create_download_pool()
+            pool = DOWNLOAD_POOL
+        return pool.submit(download_video, *args)
 
 def cleanup_old_progress():
     """Clean up progress data older than 30 minutes"""
-    import time
-    current_time = time.time()
+    cutoff = time.time() - 1800  # 30 minutes
     old_keys = []
     
-    for download_id, timestamp in progress_timestamps.items():
-        if current_time - timestamp > 1800:  # 30 minutes
+    with progress_lock:
+        # progress_timestamps is kept oldest-first, so stop at the first fresh entry
+        while progress_timestamps:
+            download_id, timestamp = next(iter(progress_timestamps.items()))
+            if timestamp > cutoff:
+                break
+            progress_timestamps.popitem(last=False)
+            download_progress.pop(download_id, None)
+            progress_queues.pop(download_id, None)
             old_keys.append(download_id)
     
     for key in old_keys:
-        download_progress.pop(key, None)
-        progress_timestamps.pop(key, None)
         logging.info(f"Cleaned up old progress data for download {key}")
 
+PROGRESS_CLEANUP_INTERVAL = 60  # seconds
+
+def progress_cleanup_loop():
+    """Expire old progress entries in the background instead of on every /progress poll"""
+    while True:
+        time.sleep(PROGRESS_CLEANUP_INTERVAL)
+        try:
+            cleanup_old_progress()
+        except Exception as e:
+            logging.error(f"Error cleaning up progress data: {e}")
+
+progress_cleanup_thread = threading.Thread(target=progress_cleanup_loop, daemon=True)
+progress_cleanup_thread.start()
+
+# user_id -> (dir mtime_ns, [file entries]) for the debug listings, which the
+# frontend polls; a directory's mtime changes whenever a file is added, renamed
+# or removed, so an unchanged mtime means the listing is still current
+user_dir_listings = OrderedDict()
+user_dir_listings_lock = threading.Lock()
+
+def list_user_dir(user_id):
+    """Return name/size/path of each file in the user's downloads directory, cached by mtime"""
+    user_downloads_dir = DOWNLOADS_ROOT / user_id
+    try:
+        dir_mtime = os.stat(user_downloads_dir).st_mtime_ns
+    except OSError:
+        return []
+    
+    with user_dir_listings_lock:
+        cached = user_dir_listings.get(user_id)
+        if cached and cached[0] == dir_mtime:
+            user_dir_listings.move_to_end(user_id)
+            return cached[1]
+    
+    with os.scandir(user_downloads_dir) as entries:
+        files = [{
+            'name': entry.name,
+            'size': entry.stat().st_size,
+            'path': entry.path
+        } for entry in entries if entry.is_file(follow_symlinks=False)]
+    
+    with user_dir_listings_lock:
+        user_dir_listings[user_id] = (dir_mtime, files)
+        user_dir_listings.move_to_end(user_id)
+        while len(user_dir_listings) > MAX_INDEXED_USERS:
+            user_dir_listings.popitem(last=False)
+    return files
+
+def scan_user_downloads(user_id):
+    """Build a user's file index from the files in their downloads directory"""
+    files = {}
+    user_downloads_dir = DOWNLOADS_ROOT / user_id
+    if not user_downloads_dir.exists():
+        return files
+    
+    # scandir's is_file() comes from the directory listing, so each file costs one stat()
+    with os.scandir(user_downloads_dir) as entries:
+        entries = [entry for entry in entries if entry.is_file()]
+    names = {entry.name for entry in entries}
+    
+    for entry in entries:
+        stem, ext = os.path.splitext(entry.name)
+        # Skip webm/m4a files if an MP3 version exists (they're intermediate files)
+        if ext.lower() in ['.webm', '.m4a', '.ogg'] and stem + '.mp3' in names:
+            continue
+        stat = entry.stat()
+        files[entry.name] = {
+            'name': entry.name,
+            'size': stat.st_size,
+            'modified': stat.st_mtime
+        }
+    return files
+
+def _indexed_user_files(user_id):
+    """Return the user's file index, scanning the disk if it isn't loaded.
+    
+    Must be called with user_downloads_lock held.
+    """
+    if user_id in user_downloads:
+        user_downloads.move_to_end(user_id)
+        return user_downloads[user_id]
+    
+    files = user_downloads[user_id] = scan_user_downloads(user_id)
+    user_downloads_generation[user_id] = next(user_downloads_generations)
+    logging.info(f"Indexed {len(files)} files from disk for user {user_id}")
+    while len(user_downloads) > MAX_INDEXED_USERS:
+        evicted_id, _ = user_downloads.popitem(last=False)
+        user_downloads_generation.pop(evicted_id, None)
+    return files
+
+def get_user_files(user_id):
+    """Return a snapshot of the user's files, indexing the disk only on first use"""
+    with user_downloads_lock:
+        files = dict(_indexed_user_files(user_id))
+    
+    # Pick up files finished by other workers
+    if redis_client is not None:
+        try:
+            for raw in redis_client.hgetall(f'user:{user_id}:files').values():
+                file_info = json.loads(raw)
+                files.setdefault(file_info['name'], file_info)
+        except Exception as e:
+            logging.warning(f"Failed to read shared file list for {user_id}: {e}")
+    
+    return list(files.values())
+
+def add_user_files(user_id, file_infos):
+    """Record files in the user's index under one lock; returns the names that weren't listed yet"""
+    if not file_infos:
+        return set()
+    
+    with user_downloads_lock:
+        files = _indexed_user_files(user_id)
+        new_names = {info['name'] for info in file_infos if info['name'] not in files}
+        files.update((info['name'], info) for info in file_infos)
+        user_downloads_generation[user_id] = next(user_downloads_generations)
+    
+    if redis_client is not None:
+        try:
+            key = f'user:{user_id}:files'
+            pipe = redis_client.pipeline()
+            pipe.hset(key, mapping={info['name']: json.dumps(info) for info in file_infos})
+            pipe.expire(key, USER_FILES_TTL)
+            pipe.execute()
+        except Exception as e:
+            logging.warning(f"Failed to share file list entries for {user_id}: {e}")
+    
+    return new_names
+
+@functools.lru_cache(maxsize=256)
+def render_downloads_listing(user_id, cache_key):
+    """(JSON body, ETag) for /downloads, newest first; cache_key changes whenever the listing can"""
+    files = sorted(get_user_files(user_id), key=itemgetter('modified'), reverse=True)
+    body = dumps_json(files)
+    return body, hashlib.blake2b(body.encode('utf-8'), digest_size=16).hexdigest()
+
+ANSI_ESCAPE_RE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
 def strip_ansi_codes(text):
     """Remove ANSI color codes from text"""
     if not isinstance(text, str):
         return text
-    # Remove ANSI escape sequences
-    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-    return ansi_escape.sub('', text).strip()
+    # Most progress strings carry no escapes at all, so skip the regex for them
+    if '\x1b' not in text:
+        return text.strip()
+    return ANSI_ESCAPE_RE.sub('', text).strip()
+
+# Filesystem-dangerous characters and their safer replacements
+FILENAME_TRANSLATION = str.maketrans({
+    '<': '(',
+    '>': ')',
+    ':': '-',
+    '"': "'",
+    '/': '-',
+    '\\': '-',
+    '|': '-',
+    '?': '',
+    '*': '',
+    '\x00': '',  # null character
+})
+MULTI_SPACE_RE = re.compile(r'\s+')
+MULTI_DASH_RE = re.compile(r'-+')
+DOT_DASH_RE = re.compile(r'\.-')
+DASH_DOT_RE = re.compile(r'-\.')
 
 def sanitize_filename(filename, max_length=100):
     """Sanitize and truncate filename to avoid filesystem issues while preserving readability"""
@@ -210,28 +552,14 @@ def sanitize_filename(filename, max_length=100):
     # Only replace truly problematic filesystem characters
     filename = str(filename)  # Ensure it's a string
     
-    # Replace filesystem-dangerous characters with safer alternatives
-    replacements = {
-        '<': '(',
-        '>': ')',
-        ':': '-',
-        '"': "'",
-        '/': '-',
-        '\\': '-',
-        '|': '-',
-        '?': '',
-        '*': '',
-        '\x00': '',  # null character
-    }
-    
-    for bad_char, replacement in replacements.items():
-        filename = filename.replace(bad_char, replacement)
+    # Replace filesystem-dangerous characters with safer alternatives in one pass
+    filename = filename.translate(FILENAME_TRANSLATION)
     
     # Step 2: Clean up multiple spaces, dashes, and dots but preserve structure
-    filename = re.sub(r'\s+', ' ', filename)  # Multiple spaces to single space
-    filename = re.sub(r'-+', '-', filename)   # Multiple dashes to single dash
-    filename = re.sub(r'\.-', '.', filename)  # Remove dash after dot
-    filename = re.sub(r'-\.', '.', filename)  # Remove dash before dot
+    filename = MULTI_SPACE_RE.sub(' ', filename)  # Multiple spaces to single space
+    filename = MULTI_DASH_RE.sub('-', filename)   # Multiple dashes to single dash
+    filename = DOT_DASH_RE.sub('.', filename)     # Remove dash after dot
+    filename = DASH_DOT_RE.sub('.', filename)     # Remove dash before dot
     
     # Step 3: Remove leading/trailing problematic characters but keep content
     filename = filename.strip(' .-_')
@@ -256,66 +584,540 @@ def sanitize_filename(filename, max_length=100):
     
     return filename
 
+def truncate_to_bytes(text, max_bytes=180):
+    """Truncate text to fit within max_bytes UTF-8 bytes, preserving word boundaries"""
+    encoded = text.encode('utf-8')
+    if len(encoded) <= max_bytes:
+        return text
+    
+    # Cut the bytes and drop any codepoint split by the cut
+    truncated = encoded[:max_bytes].decode('utf-8', errors='ignore')
+    
+    # Try to break at word boundary
+    if len(truncated) > max_bytes * 0.8:
+        last_space = truncated.rfind(' ')
+        if last_space > max_bytes * 0.7:  # Only if reasonably close
+            truncated = truncated[:last_space]
+    
+    return truncated.rstrip(' .-_')
+
 def update_progress(download_id, status_dict):
-    """Update progress with timestamp"""
-    import time
-    download_progress[download_id] = status_dict
-    progress_timestamps[download_id] = time.time()
+    """Update progress with timestamp and push it to any SSE listener"""
+    with progress_lock:
+        download_progress[download_id] = status_dict
+        progress_timestamps[download_id] = time.time()
+        progress_timestamps.move_to_end(download_id)
+        while len(progress_timestamps) > MAX_TRACKED_DOWNLOADS:
+            stale_id, _ = progress_timestamps.popitem(last=False)
+            download_progress.pop(stale_id, None)
+            progress_queues.pop(stale_id, None)
+    
+    if download_id in unknown_progress_ids:
+        with unknown_progress_ids_lock:
+            unknown_progress_ids.pop(download_id, None)
+    
+    if redis_client is not None:
+        try:
+            redis_client.setex(f'prog:{download_id}', PROGRESS_TTL, json.dumps(status_dict))
+        except Exception as e:
+            logging.warning(f"Failed to share progress for {download_id}: {e}")
+    
+    progress_queue = progress_queues.get(download_id)
+    if progress_queue is not None:
+        try:
+            progress_queue.put_nowait(status_dict)
+        except queue.Full:
+            # Listener is falling behind - drop the oldest update so the latest state wins
+            try:
+                progress_queue.get_nowait()
+            except queue.Empty:
+                pass
+            progress_queue.put_nowait(status_dict)
+
+@functools.lru_cache(maxsize=1)
+def _locate_ffmpeg():
+    """Find FFmpeg and check that it runs; returns (location, working).
+    
+    The result is constant for the life of the process, so it is cached.
+    """
+    ffmpeg_working = False
+    
+    # An explicit FFMPEG_BIN wins, then PATH (Nix builds put ffmpeg on PATH)
+    ffmpeg_location = os.environ.get('FFMPEG_BIN') or shutil.which('ffmpeg')
+    
+    if not ffmpeg_location:
+        # Fallback to common paths
+        possible_paths = [
+            '/usr/bin/ffmpeg', 
+            '/usr/local/bin/ffmpeg', 
+            '/opt/homebrew/bin/ffmpeg'
+        ]
+        for path in possible_paths:
+            if os.path.exists(path):
+                ffmpeg_location = path
+                break
+    
+    # Test if FFmpeg actually works
+    if ffmpeg_location:
+        try:
+            result = subprocess.run([ffmpeg_location, '-version'], 
+                                  capture_output=True, timeout=5)
+            ffmpeg_working = result.returncode == 0
+            logging.info(f"FFmpeg at {ffmpeg_location} - Working: {ffmpeg_working}")
+        except Exception as e:
+            logging.warning(f"FFmpeg test failed: {e}")
+            ffmpeg_working = False
+    else:
+        logging.warning("FFmpeg not found in any location")
+    
+    return ffmpeg_location, ffmpeg_working
+
+# Probe at import so the first download doesn't pay for it (and forked or
+# Celery workers inherit the answer)
+_locate_ffmpeg()
+
+# Unprocessed extract_info results, so the title lookup and the download itself
+# (and repeat downloads of the same URL) share one metadata/player-JS fetch.
+# Kept short: the stream URLs inside are signed and expire after a few hours.
+METADATA_TTL = 300  # seconds
+METADATA_CACHE_SIZE = 64
+metadata_cache = {}  # cache key -> (expires_at, info)
+metadata_cache_lock = threading.Lock()
 
-def convert_to_mp3(input_file, output_file):
-    """Convert audio file to MP3 using pydub"""
+# watch?v=ID, youtu.be/ID, /shorts/ID, /embed/ID and /live/ID all name the same video
+YOUTUBE_ID_RE = re.compile(
+    r'^(?:https?://)?(?:(?:www|m|music)\.)?(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/)|youtu\.be/)'
+    r'([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])'
+)
+
+def metadata_cache_key(url):
+    """Key YouTube URLs by video ID so share links and tracking params hit the same entry"""
+    match = YOUTUBE_ID_RE.match(url.strip())
+    # A list= parameter may turn the same ID into a playlist extraction
+    if match and 'list=' not in url:
+        return f'youtube:{match.group(1)}'
+    return url
+
+# Persist yt-dlp's own cache (deciphered player JS signatures) across restarts
+YTDLP_CACHE_DIR = os.environ.get('YTDLP_CACHE_DIR')
+
+def get_video_metadata(url):
+    """extract_info(process=False) for a URL, cached for METADATA_TTL seconds.
+    
+    Returns a private copy, since yt-dlp fills in the info dict while processing it.
+    """
+    import yt_dlp
+    
+    cache_key = metadata_cache_key(url)
+    now = time.time()
+    with metadata_cache_lock:
+        cached = metadata_cache.get(cache_key)
+    if cached and cached[0] > now:
+        return copy.deepcopy(cached[1])
+    
+    opts = {'quiet': True, 'no_warnings': True}
+    if YTDLP_CACHE_DIR:
+        opts['cachedir'] = YTDLP_CACHE_DIR
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(url, download=False, process=False)
+    
+    # Playlists come back with lazy entry generators, which can't be reused
+    if info.get('_type', 'video') != 'video':
+        return info
+    
+    with metadata_cache_lock:
+        if len(metadata_cache) >= METADATA_CACHE_SIZE:
+            # Drop expired entries, then the oldest if still full
+            for key in [k for k, (expires_at, _) in metadata_cache.items() if expires_at <= now]:
+                del metadata_cache[key]
+            if len(metadata_cache) >= METADATA_CACHE_SIZE:
+                del metadata_cache[min(metadata_cache, key=lambda k: metadata_cache[k][0])]
+        metadata_cache[cache_key] = (now + METADATA_TTL, info)
+    return copy.deepcopy(info)
+
+def dumps_json(obj):
+    """Serialize to JSON text, using orjson when it's installed"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj).decode('utf-8')
+        except TypeError:
+            pass  # e.g. numpy scalars or non-str keys; the stdlib encoder is more lenient
+    return json.dumps(obj)
+
+def fast_jsonify(obj, status=200):
+    """jsonify() replacement for hot endpoints"""
+    return app.response_class(dumps_json(obj), status=status, mimetype='application/json')
+
+# IDs already known to have no progress. Download IDs are random and /download
+# records an 'initializing' state before returning one, so an ID that isn't found
+# never comes back; remembering that spares clients still polling after expiry a
+# Redis round trip per poll.
+unknown_progress_ids = OrderedDict()
+unknown_progress_ids_lock = threading.Lock()
+MAX_UNKNOWN_PROGRESS_IDS = 1024
+
+def get_download_progress(download_id):
+    """Look up progress locally, falling back to Redis for downloads run by another worker"""
+    with unknown_progress_ids_lock:
+        if download_id in unknown_progress_ids:
+            return None
+    
+    # Downloads in worker processes only update Redis, so the local copy may be stale
+    progress = None if DOWNLOADS_OUT_OF_PROCESS else download_progress.get(download_id)
+    if progress is None and redis_client is not None:
+        try:
+            raw = redis_client.get(f'prog:{download_id}')
+            if raw:
+                progress = json.loads(raw)
+        except Exception as e:
+            logging.warning(f"Failed to read shared progress for {download_id}: {e}")
+            return None  # don't remember a lookup that failed
+    
+    if progress is None:
+        with unknown_progress_ids_lock:
+            unknown_progress_ids[download_id] = True
+            while len(unknown_progress_ids) > MAX_UNKNOWN_PROGRESS_IDS:
+                unknown_progress_ids.popitem(last=False)
+    return progress
+
+def pcm16_to_float32(data):
+    """Convert s16le PCM bytes to float32 samples in [-1, 1).
+    
+    Casts and scales in one pass into a single new array, rather than
+    astype() followed by a division that allocates a second one.
+    """
+    import numpy as np
+    samples = np.frombuffer(data, dtype=np.int16)
+    return np.multiply(samples, np.float32(1 / 32768), dtype=np.float32)
+
+def prefetch_pipe_reads(pipe, chunk_size, depth=2):
+    """Yield fixed-size reads from a pipe, reading ahead on a background thread.
+    
+    Lets ffmpeg keep decoding the next chunks while the caller is busy
+    transcribing the current one, instead of stalling on a full pipe.
+    """
+    chunks = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    
+    def reader():
+        while not stop.is_set():
+            try:
+                chunk = pipe.read(chunk_size)
+            except (OSError, ValueError):
+                chunk = b''  # pipe closed under us; report it as EOF
+            while not stop.is_set():
+                try:
+                    chunks.put(chunk, timeout=1)
+                    break
+                except queue.Full:
+                    continue
+            if not chunk:
+                return
+    
+    threading.Thread(target=reader, daemon=True).start()
     try:
-        if not PYDUB_AVAILABLE:
-            return False
-        
-        # Load the audio file
-        if input_file.suffix.lower() == '.webm':
-            audio = AudioSegment.from_file(str(input_file), format="webm")
-        elif input_file.suffix.lower() == '.m4a':
-            audio = AudioSegment.from_file(str(input_file), format="m4a")
-        else:
-            audio = AudioSegment.from_file(str(input_file))
-        
-        # Export as MP3
-        audio.export(str(output_file), format="mp3", bitrate="192k")
+        while True:
+            chunk = chunks.get()
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        stop.set()  # consumer gave up early; let the reader exit
+
+def iterate_in_background(iterable, depth=32):
+    """Yield the items of iterable while a background thread produces them.
+    
+    Used by SSE responses so transcription keeps going while the generator is
+    blocked writing to a slow client, up to depth buffered items. An exception
+    raised by the producer is re-raised here.
+    """
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    end = object()
+    
+    def put(entry):
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def producer():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((end, e))
+            return
+        put((end, None))
+    
+    threading.Thread(target=producer, daemon=True).start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is end:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()  # client went away; let the producer exit
+
+PIPE_BUFFER_SIZE = 1 << 20  # the Linux default /proc/sys/fs/pipe-max-size
+
+def enlarge_pipe_buffer(pipe, size=PIPE_BUFFER_SIZE):
+    """Grow a pipe's kernel buffer so ffmpeg can decode a whole chunk ahead.
+    
+    The default 64 KiB pipe makes ffmpeg block, and the reader wake up, about
+    fifteen times per 30-second chunk. Only Linux supports resizing; elsewhere
+    the default buffer is kept.
+    """
+    try:
+        import fcntl
+        fcntl.fcntl(pipe.fileno(), fcntl.F_SETPIPE_SZ, size)
+    except (ImportError, AttributeError, OSError):
+        pass
+
+# Decoded transcription audio, so transcribing the same video again skips ffmpeg
+PCM_CACHE_DIR = CACHE_ROOT / 'pcm'
+PCM_CACHE_MAX_BYTES = int(os.environ.get('PCM_CACHE_MAX_MB', 2048)) * 1024 * 1024
+CACHE_STALE_PART_AGE = 3600  # .part files left behind by abandoned writes
+cache_prune_lock = threading.Lock()
+
+def pcm_cache_path(url, ffmpeg_cmd):
+    """Cache file for ffmpeg's output when decoding the audio of url.
+
+    The input argument is left out of the key because it is a signed stream
+    URL that changes on every extraction; the rest of the command is kept so
+    WAV and raw PCM outputs don't share an entry.
+    """
+    args = list(ffmpeg_cmd)
+    if '-i' in args:
+        del args[args.index('-i') + 1]
+    key = f"{metadata_cache_key(url)}\0{' '.join(args)}"
+    return PCM_CACHE_DIR / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.pcm"
+
+def prune_cache_dir(cache_dir, max_bytes):
+    """Delete the least recently used entries of a cache directory until under max_bytes"""
+    entries = []
+    now = time.time()
+    with cache_prune_lock:
+        try:
+            with os.scandir(cache_dir) as it:
+                for entry in it:
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if entry.name.endswith('.part'):
+                        if now - stat.st_mtime > CACHE_STALE_PART_AGE:
+                            Path(entry.path).unlink(missing_ok=True)
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            Path(path).unlink(missing_ok=True)
+            total -= size
+
+class CachedAudioDecode:
+    """subprocess.Popen stand-in for an ffmpeg decode backed by PCM_CACHE_DIR.
+
+    On a hit, stdout reads the cached output and ffmpeg never runs. On a miss,
+    ffmpeg runs as usual and everything read from stdout is also written to the
+    cache, which is kept only if ffmpeg exits cleanly.
+    """
+
+    def __init__(self, url, ffmpeg_cmd, **popen_kwargs):
+        self.cache_path = pcm_cache_path(url, ffmpeg_cmd)
+        self.process = None
+        self.partial_path = None
+        self.partial_file = None
+        # read() runs on the prefetch thread while terminate() can come from the
+        # request thread; the partial file is only touched under this lock
+        self.partial_lock = threading.Lock()
+        try:
+            self.stdout = open(self.cache_path, 'rb')
+        except FileNotFoundError:
+            self.stdout = None
+
+        if self.stdout is not None:
+            os.utime(self.cache_path)  # mark as recently used for pruning
+            self.stderr = io.BytesIO()
+            logging.info(f"Using cached decoded audio for {url}")
+            return
+
+        self.process = subprocess.Popen(ffmpeg_cmd, **popen_kwargs)
+        self.stderr = self.process.stderr
+        self.pipe = self.process.stdout
+        enlarge_pipe_buffer(self.pipe)
+        self.stdout = self  # reads go through read() so they can be copied to the cache
+        try:
+            PCM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            self.partial_path = self.cache_path.with_name(f'{self.cache_path.name}.{uuid.uuid4().hex}.part')
+            self.partial_file = open(self.partial_path, 'wb')
+        except OSError as e:
+            logging.warning(f"Not caching decoded audio: {e}")
+            self.partial_path = None
+
+    @property
+    def returncode(self):
+        return 0 if self.process is None else self.process.returncode
+
+    def read(self, size=-1):
+        data = self.pipe.read(size)
+        with self.partial_lock:
+            if self.partial_file is not None:
+                try:
+                    if data:
+                        self.partial_file.write(data)
+                    else:
+                        self._store()
+                except OSError as e:
+                    logging.warning(f"Failed to cache decoded audio: {e}")
+                    self._discard()
+        return data
+
+    def _store(self):
+        # Called with partial_lock held
+        self.partial_file.close()
+        self.partial_file = None
+        try:
+            returncode = self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            returncode = None
+        if returncode != 0:
+            self._discard()
+            return
+        os.replace(self.partial_path, self.cache_path)
+        self.partial_path = None
+        prune_cache_dir(PCM_CACHE_DIR, PCM_CACHE_MAX_BYTES)
+
+    def _discard(self):
+        # Called with partial_lock held
+        if self.partial_file is not None:
+            self.partial_file.close()
+            self.partial_file = None
+        if self.partial_path is not None:
+            self.partial_path.unlink(missing_ok=True)
+            self.partial_path = None
+
+    def wait(self, timeout=None):
+        if self.process is None:
+            return 0
+        return self.process.wait(timeout)
+
+    def terminate(self):
+        if self.process is None:
+            self.stdout.close()
+            return
+        self.process.terminate()
+        with self.partial_lock:
+            self._discard()
+
+def convert_to_mp3(input_file, output_file, ffmpeg_location='ffmpeg'):
+    """Convert audio file to MP3 with a single direct FFmpeg call.
+    
+    ffmpeg decodes and encodes in one streaming pass with no intermediate WAV.
+    Output goes to a .part file that is renamed into place, so a half-written
+    MP3 is never listed or mistaken for a finished conversion.
+    """
+    output_file = Path(output_file)
+    partial_file = output_file.with_name(output_file.name + '.part')
+    try:
+        subprocess.run([
+            ffmpeg_location, '-y', '-nostdin',  # never block on the worker's stdin
+            '-hide_banner', '-loglevel', 'error',  # only buffer real errors, not progress lines
+            '-i', str(input_file),
+            '-vn',
+            '-codec:a', 'libmp3lame',
+            '-b:a', '192k',
+            '-threads', '0',
+            '-f', 'mp3',  # the .part suffix hides the container type from ffmpeg
+            str(partial_file)
+        ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=300)
+        os.replace(partial_file, output_file)
         return True
+    except subprocess.TimeoutExpired:
+        logging.error(f"Audio conversion timed out after 300s: {input_file}")
+        return False
+    except subprocess.CalledProcessError as e:
+        stderr = e.stderr.decode('utf-8', errors='ignore').strip() if e.stderr else ''
+        logging.error(f"Audio conversion failed: {stderr or e}")
+        return False
     except Exception as e:
         logging.error(f"Audio conversion failed: {e}")
         return False
+    finally:
+        partial_file.unlink(missing_ok=True)  # don't leave a truncated MP3 behind
+
+class DownloadTimeoutError(Exception):
+    """Raised from ProgressHook to abort a download that ran past its deadline"""
 
 class ProgressHook:
-    def __init__(self, download_id):
+    __slots__ = ('download_id', 'deadline', 'last_emit', 'last_percent_raw', 'last_speed_raw')
+    
+    # yt-dlp calls the hook many times a second while downloading; clients
+    # can't use updates faster than this anyway
+    MIN_INTERVAL = 0.25  # seconds
+    
+    def __init__(self, download_id, deadline=None):
         self.download_id = download_id
+        self.deadline = deadline  # time.monotonic() value after which the download is aborted
+        self.last_emit = 0.0
+        self.last_percent_raw = None
+        self.last_speed_raw = None
     
     def __call__(self, d):
+        now = time.monotonic()
+        # Raised outside the try below so it propagates up through yt-dlp
+        if self.deadline is not None and now > self.deadline:
+            raise DownloadTimeoutError(f"Download timed out after {DOWNLOAD_TIMEOUT // 60} minutes")
+        
         try:
-            logging.info(f"Progress hook called for {self.download_id} with status: {d.get('status', 'unknown')}")
-            
             if d['status'] == 'downloading':
-                # Clean up percent and speed strings by removing ANSI color codes
+                if now - self.last_emit < self.MIN_INTERVAL:
+                    return
+                
+                # Nothing new to report - skip the ANSI stripping and the store/queue writes
                 percent_raw = d.get('_percent_str', 'N/A')
                 speed_raw = d.get('_speed_str', 'N/A')
+                if percent_raw == self.last_percent_raw and speed_raw == self.last_speed_raw:
+                    return
+                self.last_emit = now
+                self.last_percent_raw = percent_raw
+                self.last_speed_raw = speed_raw
                 
+                # Clean up percent and speed strings by removing ANSI color codes
                 percent = strip_ansi_codes(percent_raw)
                 speed = strip_ansi_codes(speed_raw)
                 
-                download_progress[self.download_id] = {
+                update_progress(self.download_id, {
                     'status': 'downloading',
                     'percent': percent,
                     'speed': speed
-                }
-                logging.info(f"Progress {self.download_id}: {percent} at {speed}")
+                })
+                if logging.getLogger().isEnabledFor(logging.DEBUG):
+                    logging.debug(f"Progress {self.download_id}: {percent} at {speed}")
             elif d['status'] == 'finished':
                 # Don't set 'finished' yet - let the main download function handle final status
                 # after post-processing (MP3 conversion) is complete
-                download_progress[self.download_id] = {
+                update_progress(self.download_id, {
                     'status': 'processing',
                     'message': 'Download completed, processing files...'
-                }
+                })
                 logging.info(f"Download {self.download_id} finished downloading: {d.get('filename', 'unknown')}, moving to processing")
             else:
-                # Log other statuses for debugging
-                logging.info(f"Progress {self.download_id}: status={d.get('status')}, data={d}")
+                # Log other statuses for debugging (lazy: d can be large)
+                logging.debug("Progress %s: status=%s, data=%s", self.download_id, d.get('status'), d)
         except Exception as e:
             logging.error(f"Progress hook error for {self.download_id}: {e}")
 
@@ -324,10 +1126,9 @@ def index():
     # Initialize session if not exists
     if 'user_id' not in session:
         session['user_id'] = str(uuid.uuid4())
-        user_downloads[session['user_id']] = []
         logging.info(f"Index page: Created new session with user_id: {session['user_id']}")
     else:
-        logging.info(f"Index page: Using existing session with user_id: {session['user_id']}")
+        logging.debug(f"Index page: Using existing session with user_id: {session['user_id']}")
     
     return render_template('index.html', languages=app.config['LANGUAGES'])
 
@@ -339,7 +1140,7 @@ def set_language(language=None):
 
 @app.route('/health')
 def health_check():
-    return jsonify({'status': 'healthy', 'service': 'youtube-downloader'})
+    return fast_jsonify({'status': 'healthy', 'service': 'youtube-downloader'})
 
 @app.route('/ping')
 def ping():
@@ -348,8 +1149,11 @@ def ping():
 
 @app.route('/sw.js')
 def serve_sw():
-    """Serve PropellerAds service worker file"""
-    return send_file('sw.js', mimetype='application/javascript')
+    """Serve PropellerAds service worker file.
+    
+    It lives in static/ but must be served from the site root to control every page.
+    """
+    return app.send_static_file('sw.js')
 
 @app.route('/test-ytdlp')
 def test_ytdlp():
@@ -377,22 +1181,33 @@ def test_ytdlp():
             'error': str(e)
         }), 500
 
+@app.route('/debug-ffmpeg')
+def debug_ffmpeg():
+    """Show the cached FFmpeg detection; ?redetect=1 probes again (e.g. after installing it)"""
+    if request.args.get('redetect'):
+        _locate_ffmpeg.cache_clear()
+    ffmpeg_location, ffmpeg_working = _locate_ffmpeg()
+    return jsonify({
+        'ffmpeg_location': ffmpeg_location,
+        'ffmpeg_working': ffmpeg_working
+    })
+
 @app.route('/debug-status')
 def debug_status():
     """Debug endpoint to check current status"""
     current_user_id = session.get('user_id', 'no_session')
-    user_downloads_dir = Path('downloads') / current_user_id if current_user_id != 'no_session' else None
+    user_downloads_dir = DOWNLOADS_ROOT / current_user_id if current_user_id != 'no_session' else None
     
     files_on_disk = []
-    if user_downloads_dir and user_downloads_dir.exists():
-        files_on_disk = [f.name for f in user_downloads_dir.iterdir() if f.is_file()]
+    if user_downloads_dir:
+        files_on_disk = [entry['name'] for entry in list_user_dir(current_user_id)]
     
     response_data = {
         'active_downloads': len(download_progress),
         'download_progress': download_progress,
         'user_downloads_count': len(user_downloads),
         'current_user_id': current_user_id,
-        'user_downloads_in_memory': user_downloads.get(current_user_id, []),
+        'user_downloads_in_memory': get_user_files(current_user_id),
         'files_on_disk': files_on_disk,
         'all_user_downloads': user_downloads
     }
@@ -417,25 +1232,22 @@ def session_info():
 def test_downloads():
     """Test endpoint to debug downloads without cache"""
     user_id = session.get('user_id', 'no_session')
-    user_downloads_dir = Path('downloads') / user_id if user_id != 'no_session' else None
+    user_downloads_dir = DOWNLOADS_ROOT / user_id if user_id != 'no_session' else None
     
     files_on_disk = []
-    if user_downloads_dir and user_downloads_dir.exists():
-        files_on_disk = [{
-            'name': f.name,
-            'size': f.stat().st_size,
-            'path': str(f)
-        } for f in user_downloads_dir.iterdir() if f.is_file()]
+    if user_downloads_dir:
+        files_on_disk = list_user_dir(user_id)
     
     return jsonify({
         'session_user_id': user_id,
-        'files_in_memory': user_downloads.get(user_id, []),
+        'files_in_memory': get_user_files(user_id),
         'files_on_disk': files_on_disk,
         'directory_path': str(user_downloads_dir) if user_downloads_dir else 'no_session'
     })
 
 @app.route('/download', methods=['POST'])
 def download():
+    global pending_downloads
     try:
         data = request.json
         url = data.get('url')
@@ -447,159 +1259,319 @@ def download():
             logging.info(f"Transcribe format requested, converting to MP3 download")
         
         if not url:
-            return jsonify({'error': 'URL is required'}), 400
+            return fast_jsonify({'error': 'URL is required'}), 400
         
         # Ensure user has session
         if 'user_id' not in session:
             session['user_id'] = str(uuid.uuid4())
-            user_downloads[session['user_id']] = []
             logging.info(f"Download endpoint: Created new session with user_id: {session['user_id']}")
         
         user_id = session['user_id']
-        logging.info(f"Download endpoint: Using user_id: {user_id}")
+        logging.debug(f"Download endpoint: Using user_id: {user_id}")
         
         # Check resource limits if resource manager is available
         if resource_manager:
             if not resource_manager.can_start_download(user_id):
-                return jsonify({'error': 'Too many concurrent downloads. Please wait for current downloads to finish.'}), 429
+                return fast_jsonify({'error': 'Too many concurrent downloads. Please wait for current downloads to finish.'}), 429
+            
+            if not resource_manager.check_rate_limit(user_id):
+                response = fast_jsonify({'error': 'Too many download requests. Please wait a minute and try again.'})
+                response.headers['Retry-After'] = '60'
+                return response, 429
             
             if not resource_manager.check_disk_space():
-                return jsonify({'error': 'Server storage is full. Please try again later.'}), 503
+                return fast_jsonify({'error': 'Server storage is full. Please try again later.'}), 503
         
         # Generate unique download ID
-        download_id = str(int(time.time() * 1000))
+        download_id = secrets.token_urlsafe(12)  # 96 random bits, no same-millisecond collisions
         
         original_format = data.get('format', 'video')
         logging.info(f"Starting download for URL: {url}, original format: {original_format}, actual format: {format_type}")
         
-        # Track download start with resource manager
-        if resource_manager:
-            resource_manager.start_download(user_id)
-        
-        # Start download in background thread
-        thread = threading.Thread(target=download_video, args=(url, format_type, download_id, user_id))
-        thread.daemon = True  # Make thread daemon so it doesn't block shutdown
-        thread.start()
+        # Recorded right away so a client that subscribes before a worker
+        # picks the job up doesn't see 'not_found'
+        initial_progress = {
+            'status': 'initializing',
+            'message': 'Waiting for a download slot...'
+        }
         
-        return jsonify({'download_id': download_id})
+        if celery is not None:
+            # A Celery worker owns the download; the broker does the queueing
+            if not reserve_celery_download_slot(user_id):
+                return fast_jsonify({'error': 'Too many concurrent downloads. Please wait for current downloads to finish.'}), 429
+            try:
+                update_progress(download_id, initial_progress)
+                download_video_task.delay(url, format_type, download_id, user_id)
+            except Exception:
+                release_celery_download_slot(user_id)
+                raise
+            return fast_jsonify({'download_id': download_id})
+        
+        # Refuse new work while the download queue is saturated. Checked before
+        # any progress is recorded so rejected requests leave nothing behind to poll.
+        with pending_downloads_lock:
+            if pending_downloads >= DOWNLOAD_QUEUE_LIMIT:
+                logging.warning(f"Download queue full ({pending_downloads}/{DOWNLOAD_QUEUE_LIMIT}), rejecting request")
+                response = fast_jsonify({'error': 'Server is busy. Please try again shortly.'})
+                response.headers['Retry-After'] = '30'
+                return response, 503
+            pending_downloads += 1
+        
+        # Until the job is on the pool, _download_done won't run to give the slot back
+        download_started = False
+        try:
+            update_progress(download_id, initial_progress)
+            
+            if not DOWNLOAD_PROCESSES:
+                # Worker processes can't feed this queue; SSE clients fall back to polling Redis
+                progress_queues[download_id] = queue.Queue(maxsize=100)
+            
+            # Track download start with resource manager
+            if resource_manager:
+                resource_manager.start_download(user_id)
+                download_started = True
+            
+            # Queue the download on the shared worker pool
+            future = submit_download(url, format_type, download_id, user_id)
+        except Exception:
+            with pending_downloads_lock:
+                pending_downloads -= 1
+            if download_started:
+                resource_manager.finish_download(user_id)
+            progress_queues.pop(download_id, None)
+            raise
+        future.add_done_callback(functools.partial(_download_done, user_id))
+        
+        return fast_jsonify({'download_id': download_id})
     except Exception as e:
         logging.error(f"Error in download endpoint: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return fast_jsonify({'error': 'Internal server error'}), 500
+
+# yt-dlp options shared by every download; download_video adds the per-call ones
+YTDL_BASE_OPTS = types.MappingProxyType({
+    **({'cachedir': YTDLP_CACHE_DIR} if YTDLP_CACHE_DIR else {}),
+    'restrictfilenames': False,  # Keep original titles readable
+    'windowsfilenames': False,   # Don't over-restrict filenames
+    'no_warnings': False,
+    'extract_flat': False,
+    'socket_timeout': 15,
+    'retries': 1,
+    'fragment_retries': 1,
+    # Fetch DASH/HLS fragments in parallel and split progressive
+    # downloads into ranged requests to sidestep per-connection throttling
+    'concurrent_fragment_downloads': int(os.environ.get('YTDL_FRAG_WORKERS', 8)),
+    'http_chunk_size': 10 * 1024 * 1024,  # 10 MiB
+    # yt-dlp writes each read block straight to disk, so a large
+    # block size keeps writes well above 64 KiB per syscall
+    'buffersize': 1024 * 1024,
+    'file_access_retries': 3,
+    'ignoreerrors': False,
+    'noprogress': True,
+})
+
+# Add user agent to avoid blocking
+YTDL_HTTP_HEADERS = types.MappingProxyType({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-us,en;q=0.5',
+    'Sec-Fetch-Mode': 'navigate'
+})
+
+# Audio stream for URL transcription: AAC for compatibility, then opus/webm,
+# then any audio-only stream, then a muxed one (ffmpeg drops the video)
+TRANSCRIBE_AUDIO_FORMAT = 'bestaudio[acodec^=mp4a]/bestaudio[acodec^=opus]/bestaudio/best'
+
+# Stream chosen for transcribing each video. Signed stream URLs stay valid for
+# hours, so a short TTL safely covers retries and repeat requests.
+TRANSCRIBE_STREAM_TTL = 600  # seconds
+transcribe_stream_cache = {}  # cache key -> (expires_at, (title, duration, audio format))
+transcribe_stream_cache_lock = threading.Lock()
+
+def get_transcribe_stream(url):
+    """Return (title, duration, audio format) of the stream to transcribe url from.
+    
+    Selects TRANSCRIBE_AUDIO_FORMAT from the cached metadata instead of running
+    a full extraction, and remembers the choice for TRANSCRIBE_STREAM_TTL seconds.
+    The format is a read-only mapping shared between requests.
+    """
+    import yt_dlp
+    
+    cache_key = metadata_cache_key(url)
+    now = time.time()
+    with transcribe_stream_cache_lock:
+        cached = transcribe_stream_cache.get(cache_key)
+    if cached and cached[0] > now:
+        return cached[1]
+    
+    opts = {'quiet': True, 'no_warnings': True, 'format': TRANSCRIBE_AUDIO_FORMAT}
+    if YTDLP_CACHE_DIR:
+        opts['cachedir'] = YTDLP_CACHE_DIR
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.process_ie_result(get_video_metadata(url), download=False)
+    
+    # The selected format's fields are merged into info (requested_formats only for merges)
+    best_audio = types.MappingProxyType(info.get('requested_formats', [info])[0])
+    stream = (info.get('title', 'Unknown'), info.get('duration', 0), best_audio)
+    if not best_audio.get('url'):
+        return stream
+    
+    with transcribe_stream_cache_lock:
+        if len(transcribe_stream_cache) >= METADATA_CACHE_SIZE:
+            # Drop expired entries, then the oldest if still full
+            for key in [k for k, (expires_at, _) in transcribe_stream_cache.items() if expires_at <= now]:
+                del transcribe_stream_cache[key]
+            if len(transcribe_stream_cache) >= METADATA_CACHE_SIZE:
+                del transcribe_stream_cache[min(transcribe_stream_cache, key=lambda k: transcribe_stream_cache[k][0])]
+        transcribe_stream_cache[cache_key] = (now + TRANSCRIBE_STREAM_TTL, stream)
+    return stream
+
+# Workers preparing chunk batches for the non-streaming SenseVoice path. The
+# model itself runs one generate() at a time and gets its speedup from
+# batching, so a second worker only keeps the next batch ready.
+SENSEVOICE_WORKERS = max(1, int(os.environ.get('SENSEVOICE_WORKERS', 2)))
+SENSEVOICE_BATCH_SIZE = max(1, int(os.environ.get('SENSEVOICE_BATCH_SIZE', 4)))  # chunks per model call
+
+# Audio repeated at the start of each chunk so words cut at a boundary are heard whole once
+TRANSCRIBE_CHUNK_OVERLAP = 16000 * 1  # samples
+
+# CJK scripts are written without spaces, so each character is its own token
+CJK_CHARS = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+TRANSCRIPT_TOKEN_RE = re.compile(f'[{CJK_CHARS}]|[^\\s{CJK_CHARS}]+')
+TRANSCRIPT_PUNCTUATION = '.,!?;:"\'，。！？、；：'
+
+def merge_overlapping_transcripts(prev, following, window=8, slack=2, min_match=2):
+    """Join the transcripts of two chunks whose audio overlaps.
+    
+    The overlap is transcribed twice, so find the longest run of tokens shared
+    by the end of prev and the start of following and keep it only once.
+    window is how many tokens one second of overlap can hold, and the run must
+    end within slack tokens of prev's end and start within slack tokens of
+    following's start, so a common phrase further from the seam is never
+    taken as the overlap. Falls back to a plain join when no run of at least
+    min_match tokens qualifies.
+    """
+    prev_tokens = list(TRANSCRIPT_TOKEN_RE.finditer(prev))[-window:]
+    next_tokens = list(TRANSCRIPT_TOKEN_RE.finditer(following))[:window]
+    # Compare words without case or surrounding punctuation
+    a = [m.group().strip(TRANSCRIPT_PUNCTUATION).lower() for m in prev_tokens]
+    b = [m.group().strip(TRANSCRIPT_PUNCTUATION).lower() for m in next_tokens]
+    
+    best = end_a = end_b = 0
+    previous_row = [0] * (len(b) + 1)
+    for i in range(len(a)):
+        row = [0] * (len(b) + 1)
+        for j in range(len(b)):
+            if a[i] and a[i] == b[j]:
+                length = row[j + 1] = previous_row[j] + 1
+                at_seam = i + 1 >= len(a) - slack and j + 1 - length <= slack
+                if at_seam and length > best:
+                    best, end_a, end_b = length, i + 1, j + 1
+        previous_row = row
+    
+    if best < min_match:
+        return f'{prev} {following}'
+    return prev[:prev_tokens[end_a - best].start()] + following[next_tokens[end_b - best].start():]
+
+# Finished transcripts, so the same video or file isn't transcribed twice.
+# Recent ones stay in memory; all are written to disk to survive restarts,
+# least recently used first out once over TRANSCRIPT_CACHE_MAX_BYTES.
+TRANSCRIPT_CACHE_DIR = CACHE_ROOT / 'transcripts'
+TRANSCRIPT_CACHE_MAX_BYTES = int(os.environ.get('TRANSCRIPT_CACHE_MAX_MB', 256)) * 1024 * 1024
+MAX_CACHED_TRANSCRIPTS = 256
+transcript_cache = OrderedDict()  # key -> result dict, least recently used first
+transcript_cache_lock = threading.Lock()
+
+def transcript_cache_key(source, language, model_name):
+    """Cache key for transcribing source (a video key or file signature)"""
+    raw = f'{source}\0{language}\0{model_name}'.encode('utf-8')
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+def _remember_transcript(key, result):
+    with transcript_cache_lock:
+        transcript_cache[key] = result
+        transcript_cache.move_to_end(key)
+        while len(transcript_cache) > MAX_CACHED_TRANSCRIPTS:
+            transcript_cache.popitem(last=False)
+
+def get_cached_transcript(key):
+    """Return the cached result for key, or None"""
+    with transcript_cache_lock:
+        result = transcript_cache.get(key)
+        if result is not None:
+            transcript_cache.move_to_end(key)
+            return result
+    path = TRANSCRIPT_CACHE_DIR / f'{key}.json'
+    try:
+        with open(path, 'rb') as f:
+            result = json.load(f)
+        os.utime(path)  # mark as recently used for pruning
+    except (OSError, ValueError):
+        return None
+    _remember_transcript(key, result)
+    return result
+
+def store_transcript(key, result):
+    """Cache a successful transcription result in memory and on disk"""
+    _remember_transcript(key, result)
+    path = TRANSCRIPT_CACHE_DIR / f'{key}.json'
+    partial_path = path.with_name(f'{path.name}.{uuid.uuid4().hex}.part')
+    try:
+        TRANSCRIPT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        partial_path.write_text(dumps_json(result), encoding='utf-8')
+        os.replace(partial_path, path)
+    except OSError as e:
+        partial_path.unlink(missing_ok=True)
+        logging.warning(f"Failed to write transcript cache entry {key}: {e}")
+        return
+    prune_cache_dir(TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_BYTES)
 
 def download_video(url, format_type, download_id, user_id):
+    # Imported on first use: yt_dlp loads hundreds of extractor modules, which
+    # would otherwise slow every cold start before the first request is served
+    import yt_dlp
+    
     try:
-        logging.info(f"STEP 1: Processing download {download_id}: {url} for user {user_id}")
+        logging.debug(f"STEP 1: Processing download {download_id}: {url} for user {user_id}")
         
         # Update progress to show we're starting
         update_progress(download_id, {
             'status': 'initializing',
             'message': 'Initializing download...'
         })
-        logging.info(f"STEP 2: Set initializing status for {download_id}")
+        logging.debug(f"STEP 2: Set initializing status for {download_id}")
         
         # Create user-specific downloads directory
-        downloads_dir = Path('downloads') / user_id
+        downloads_dir = DOWNLOADS_ROOT / user_id
         downloads_dir.mkdir(parents=True, exist_ok=True)
-        logging.info(f"STEP 3: Created downloads directory for {download_id}")
+        logging.debug(f"STEP 3: Created downloads directory for {download_id}")
         
-        # Find and validate FFmpeg
-        ffmpeg_location = None
-        ffmpeg_working = False
-        logging.info(f"STEP 4: Starting FFmpeg detection for {download_id}")
+        # Find and validate FFmpeg (probed once per process)
+        logging.debug(f"STEP 4: Starting FFmpeg detection for {download_id}")
+        ffmpeg_location, ffmpeg_working = _locate_ffmpeg()
         
-        # Try to find ffmpeg in PATH first
-        import shutil
-        import subprocess
-        
-        ffmpeg_location = shutil.which('ffmpeg')
-        
-        if not ffmpeg_location:
-            # Fallback to common paths
-            possible_paths = [
-                '/usr/bin/ffmpeg', 
-                '/usr/local/bin/ffmpeg', 
-                '/opt/homebrew/bin/ffmpeg',
-                '/nix/store/*/bin/ffmpeg'  # Nix store path pattern
-            ]
-            for path in possible_paths:
-                if '*' in path:
-                    # Handle Nix store pattern
-                    import glob
-                    matches = glob.glob(path)
-                    if matches:
-                        ffmpeg_location = matches[0]
-                        break
-                elif os.path.exists(path):
-                    ffmpeg_location = path
-                    break
-        
-        # Test if FFmpeg actually works
-        if ffmpeg_location:
-            try:
-                result = subprocess.run([ffmpeg_location, '-version'], 
-                                      capture_output=True, timeout=5)
-                ffmpeg_working = result.returncode == 0
-                logging.info(f"FFmpeg at {ffmpeg_location} - Working: {ffmpeg_working}")
-            except Exception as e:
-                logging.warning(f"FFmpeg test failed: {e}")
-                ffmpeg_working = False
-        else:
-            logging.warning("FFmpeg not found in any location")
-        logging.info(f"STEP 5: Download format requested: {format_type}")
+        logging.debug(f"STEP 5: Download format requested: {format_type}")
         
         # Update progress to show we're preparing
         update_progress(download_id, {
             'status': 'preparing',
             'message': 'Preparing download...'
         })
-        logging.info(f"STEP 6: Set preparing status for {download_id}")
+        logging.debug(f"STEP 6: Set preparing status for {download_id}")
         
         # Configure yt-dlp options with cleaner output
         # First get video info to check title length
         video_title = None
         try:
-            with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as test_ydl:
-                info = test_ydl.extract_info(url, download=False)
-                video_title = info.get('title', 'video')
-                logging.info(f"Video title: {video_title}")
+            info = get_video_metadata(url)
+            video_title = info.get('title', 'video')
+            logging.info(f"Video title: {video_title}")
         except Exception as e:
             logging.warning(f"Could not extract title: {e}")
             video_title = 'video'
         
         # Smart filename template based on byte length (for cross-platform compatibility)
-        def get_byte_length(text):
-            """Get the UTF-8 byte length of a string"""
-            return len(text.encode('utf-8'))
-        
-        def truncate_to_bytes(text, max_bytes=180):
-            """Truncate text to fit within max_bytes UTF-8 bytes, preserving word boundaries"""
-            if get_byte_length(text) <= max_bytes:
-                return text
-            
-            # Binary search to find the longest substring that fits
-            left, right = 0, len(text)
-            best_length = 0
-            
-            while left <= right:
-                mid = (left + right) // 2
-                if get_byte_length(text[:mid]) <= max_bytes:
-                    best_length = mid
-                    left = mid + 1
-                else:
-                    right = mid - 1
-            
-            truncated = text[:best_length]
-            
-            # Try to break at word boundary
-            if best_length < len(text) and best_length > max_bytes * 0.8:
-                last_space = truncated.rfind(' ')
-                if last_space > max_bytes * 0.7:  # Only if reasonably close
-                    truncated = truncated[:last_space]
-            
-            return truncated.rstrip(' .-_')
-        
-        title_bytes = get_byte_length(video_title)
-        logging.info(f"Video title '{video_title[:50]}...' is {len(video_title)} chars, {title_bytes} bytes")
+        title_bytes = len(video_title.encode('utf-8'))
+        logging.debug(f"Video title '{video_title[:50]}...' is {len(video_title)} chars, {title_bytes} bytes")
         
         # Use byte-aware truncation (leaving room for .mp3/.mp4 extension)
         if title_bytes > 180:  # Conservative limit, accounting for extension
@@ -607,33 +1579,21 @@ def download_video(url, format_type, download_id, user_id):
             # Create a custom template with the pre-truncated title
             safe_title = truncated_title.replace('%', '%%')  # Escape any % in title
             filename_template = f'{safe_title}.%(ext)s'
-            logging.info(f"Using byte-truncated title: '{truncated_title}' ({get_byte_length(truncated_title)} bytes)")
+            logging.debug(f"Using byte-truncated title: '{truncated_title}' ({len(truncated_title.encode('utf-8'))} bytes)")
         else:
             filename_template = '%(title)s.%(ext)s'
-            logging.info(f"Using full title ({title_bytes} bytes - safe for all filesystems)")
+            logging.debug(f"Using full title ({title_bytes} bytes - safe for all filesystems)")
         
         base_opts = {
+            **YTDL_BASE_OPTS,
             'outtmpl': {'default': str(downloads_dir / filename_template)},
-            'restrictfilenames': False,  # Keep original titles readable
-            'windowsfilenames': False,   # Don't over-restrict filenames
-            'progress_hooks': [ProgressHook(download_id)],
-            'no_warnings': False,
-            'extract_flat': False,
-            'socket_timeout': 15,
-            'retries': 1,
-            'fragment_retries': 1,
-            'ignoreerrors': False,
-            'verbose': True,
-            'quiet': False,
-            # Add user agent to avoid blocking
-            'http_headers': {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'en-us,en;q=0.5',
-                'Sec-Fetch-Mode': 'navigate'
-            },
-            # Reduce color output for better parsing
-            'compat_opts': set(),
+            'progress_hooks': [ProgressHook(download_id, deadline=time.monotonic() + DOWNLOAD_TIMEOUT)],
+            # yt-dlp's own console output (and its progress bar) only when debugging;
+            # ProgressHook still receives every update
+            'verbose': logging.getLogger().isEnabledFor(logging.DEBUG),
+            'quiet': not logging.getLogger().isEnabledFor(logging.DEBUG),
+            # Private copy, in case yt-dlp merges its defaults into it
+            'http_headers': dict(YTDL_HTTP_HEADERS),
         }
         
         if ffmpeg_working:
@@ -653,54 +1613,59 @@ def download_video(url, format_type, download_id, user_id):
                     }],
                 }
             else:
-                # FFmpeg not working - download audio for custom conversion
-                logging.info("FFmpeg not available - will use custom conversion to MP3")
+                # FFmpeg not working - prefer AAC in an .m4a container, which plays
+                # everywhere as-is, so there is usually nothing left to transcode
+                logging.info("FFmpeg not available - downloading m4a audio without conversion")
                 ydl_opts = {
                     **base_opts,
-                    'format': 'bestaudio/best',
+                    'format': 'bestaudio[ext=m4a]/bestaudio/best',
                 }
         else:
             ydl_opts = {
                 **base_opts,
                 'format': 'best[height<=720]/best[height<=480]/best',
             }
+            # Progressive (non-fragmented) formats download over a single
+            # connection; hand them to aria2c for multi-part fetching if present
+            if shutil.which('aria2c'):
+                ydl_opts['external_downloader'] = {'http': 'aria2c'}
+                ydl_opts['external_downloader_args'] = {'aria2c': ['-x', '8', '-s', '8', '-k', '1M']}
+                logging.info("Using aria2c for progressive video download")
         
-        logging.info(f"STEP 7: Starting yt-dlp download with options: {ydl_opts}")
+        # Lazy %-formatting: the options dict is only rendered when DEBUG is enabled
+        logging.debug("STEP 7: Starting yt-dlp download with options: %s", ydl_opts)
         
         # Update progress to show download starting
         update_progress(download_id, {
             'status': 'starting',
             'message': 'Starting yt-dlp download...'
         })
-        logging.info(f"STEP 8: Set starting status for {download_id}")
+        logging.debug(f"STEP 8: Set starting status for {download_id}")
         
-        logging.info(f"STEP 9: About to start download thread for {download_id}")
+        logging.debug(f"STEP 9: About to start download for {download_id}")
         download_success = False
         error_message = None
         
         def download_worker():
             nonlocal download_success, error_message
             try:
-                logging.info(f"Download worker starting for {download_id}")
+                logging.debug(f"Download worker starting for {download_id}")
+                logging.debug(f"Using filename template: {ydl_opts['outtmpl']['default']}")
                 
-                # First, test if we can extract info without downloading
-                try:
-                    logging.info(f"Testing URL extraction for {download_id}")
-                    with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as test_ydl:
-                        info = test_ydl.extract_info(url, download=False)
-                        logging.info(f"URL extraction successful for {download_id}: {info.get('title', 'Unknown')[:50]}")
-                except Exception as extract_error:
-                    logging.error(f"URL extraction failed for {download_id}: {extract_error}")
-                    raise Exception(f"Failed to extract video info: {extract_error}")
-                
-                # Now proceed with actual download
-                logging.info(f"Starting actual download for {download_id}")
-                logging.info(f"Using filename template: {ydl_opts['outtmpl']['default']}")
+                # Reuse the (cached) metadata from the title lookup instead of a
+                # second extraction; process_ie_result applies this download's format
+                info = None
                 try:
+                    try:
+                        info = get_video_metadata(url)
+                    except Exception as extract_error:
+                        logging.error(f"URL extraction failed for {download_id}: {extract_error}")
+                        raise Exception(f"Failed to extract video info: {extract_error}")
+                    logging.debug(f"URL extraction successful for {download_id}: {(info.get('title') or 'Unknown')[:50]}")
+                    
                     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                        logging.info(f"Calling yt-dlp download for {download_id}")
-                        ydl.download([url])
-                        logging.info(f"yt-dlp download completed for {download_id}")
+                        ydl.process_ie_result(info, download=True)
+                        logging.debug(f"yt-dlp download completed for {download_id}")
                 except Exception as download_error:
                     error_str = str(download_error)
                     logging.error(f"Download error for {download_id}: {download_error}")
@@ -724,7 +1689,11 @@ def download_video(url, format_type, download_id, user_id):
                         
                         logging.info(f"Retrying download with video ID template: {fallback_opts['outtmpl']['default']}")
                         with yt_dlp.YoutubeDL(fallback_opts) as ydl:
-                            ydl.download([url])
+                            if info is not None:
+                                # Reuse the metadata we already have
+                                ydl.process_ie_result(get_video_metadata(url), download=True)
+                            else:
+                                ydl.download([url])
                             logging.info(f"SUCCESS: Download completed with video ID fallback for {download_id}")
                     else:
                         # Not a filename error - re-raise the original error
@@ -736,9 +1705,7 @@ def download_video(url, format_type, download_id, user_id):
                 error_message = str(e)
                 logging.error(f"Download error for {download_id}: {e}")
         
-        # Start download in a separate thread with timeout
-        
-        logging.info(f"Starting download thread for {download_id}")
+        logging.debug(f"Starting download for {download_id}")
         
         # Update progress to show we're actively downloading
         update_progress(download_id, {
@@ -748,253 +1715,258 @@ def download_video(url, format_type, download_id, user_id):
             'message': 'Download in progress'
         })
         
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(download_worker)
-            
-            # Monitor progress with periodic updates
-            import time
-            start_time = time.time()
-            
-            while True:
-                try:
-                    # Check if download is complete every 3 seconds
-                    future.result(timeout=3)
-                    # Download completed successfully
-                    logging.info(f"Download thread completed for {download_id}, success: {download_success}")
-                    
-                    # Update to show we're moving to processing phase
-                    download_progress[download_id] = {
-                        'status': 'processing',
-                        'message': 'Download completed, processing files...'
-                    }
-                    break
-                    
-                except concurrent.futures.TimeoutError:
-                    # Still downloading, update progress periodically
-                    elapsed = time.time() - start_time
-                    if elapsed > 180:  # 3 minute total timeout
-                        logging.error(f"Download timed out after 3 minutes for {download_id}")
-                        download_progress[download_id] = {
-                            'status': 'error',
-                            'error': 'Download timed out after 3 minutes'
-                        }
-                        return
-                    
-                    # Update progress based on elapsed time (simulation)
-                    if elapsed < 60:  # First minute: 0-70%
-                        percent = min(int((elapsed / 60) * 70), 70)
-                    else:  # After first minute: 70-95%
-                        percent = min(70 + int(((elapsed - 60) / 120) * 25), 95)
-                    
-                    download_progress[download_id] = {
-                        'status': 'downloading',
-                        'percent': f'{percent}%',
-                        'speed': 'Downloading...',
-                        'message': 'Download in progress'
-                    }
-                    continue
-            
+        # Run yt-dlp right here on the pool thread; ProgressHook enforces
+        # DOWNLOAD_TIMEOUT by aborting the download once the deadline passes
+        download_worker()
+        logging.debug(f"Download worker completed for {download_id}, success: {download_success}")
         
         if error_message:
-            download_progress[download_id] = {
+            update_progress(download_id, {
                 'status': 'error',
                 'error': error_message
-            }
+            })
             return
         
         if not download_success:
-            download_progress[download_id] = {
+            update_progress(download_id, {
                 'status': 'error',
                 'error': 'Download failed for unknown reason'
-            }
+            })
             return
             
         # Update progress to show processing
-        download_progress[download_id] = {
+        update_progress(download_id, {
             'status': 'processing',
             'message': 'Download completed, processing files...'
-        }
+        })
         
-        logging.info(f"Download completed, checking files in {downloads_dir}")
+        logging.debug(f"Download completed, checking files in {downloads_dir}")
         
         # List all files in the directory for debugging
-        all_files = list(downloads_dir.iterdir()) if downloads_dir.exists() else []
-        logging.info(f"Files found in directory: {[f.name for f in all_files if f.is_file()]}")
-        
-        # Initialize user downloads if needed
-        if user_id not in user_downloads:
-            user_downloads[user_id] = []
-            logging.info(f"Created new user downloads list for {user_id}")
+        all_files = os.listdir(downloads_dir) if downloads_dir.exists() else []
+        logging.debug(f"Files found in directory: {all_files}")
         
         # Initialize files list to track what gets added to user downloads
         final_files = []
-        logging.info(f"Starting file processing for format_type: {format_type}, ffmpeg_working: {ffmpeg_working}, PYDUB_AVAILABLE: {PYDUB_AVAILABLE}")
+        logging.debug(f"Starting file processing for format_type: {format_type}, ffmpeg_working: {ffmpeg_working}")
         
         try:
-            # Post-process for MP3 conversion if needed
-            if format_type == 'mp3' and not ffmpeg_working and PYDUB_AVAILABLE:
+            # Post-process for MP3 conversion only if an ffmpeg binary exists but
+            # failed the startup probe; without one the m4a is served as-is
+            if format_type == 'mp3' and not ffmpeg_working and ffmpeg_location:
                 logging.info("Starting custom MP3 conversion...")
                 # Update progress to show conversion
-                download_progress[download_id] = {
+                update_progress(download_id, {
                     'status': 'converting',
                     'message': 'Converting to MP3...'
-                }
+                })
                 
                 # Process audio files for conversion
-                for file_path in downloads_dir.iterdir():
-                    if file_path.is_file() and file_path.suffix.lower() in ['.webm', '.m4a', '.ogg']:
-                        mp3_path = file_path.with_suffix('.mp3')
-                        logging.info(f"Converting {file_path.name} to {mp3_path.name}")
-                        
-                        if convert_to_mp3(file_path, mp3_path):
-                            # Conversion successful - remove original and track MP3
-                            file_path.unlink()
-                            logging.info(f"Successfully converted to MP3: {mp3_path.name}")
-                            final_files.append(mp3_path)
-                        else:
-                            logging.warning(f"Conversion failed, keeping original: {file_path.name}")
-                            final_files.append(file_path)
+                with os.scandir(downloads_dir) as entries:
+                    audio_files = [Path(entry.path) for entry in entries
+                                   if entry.is_file(follow_symlinks=False)
+                                   and os.path.splitext(entry.name)[1].lower() in ['.webm', '.m4a', '.ogg']]
+                def convert_one(file_path):
+                    mp3_path = file_path.with_suffix('.mp3')
+                    logging.info(f"Converting {file_path.name} to {mp3_path.name}")
+                    
+                    if convert_to_mp3(file_path, mp3_path, ffmpeg_location or 'ffmpeg'):
+                        # Conversion successful - remove original and track MP3
+                        file_path.unlink()
+                        logging.info(f"Successfully converted to MP3: {mp3_path.name}")
+                        return mp3_path
+                    logging.warning(f"Conversion failed, keeping original: {file_path.name}")
+                    return file_path
                 
-                # Add a small delay to ensure file operations are complete
-                import time
-                time.sleep(1)
+                if len(audio_files) > 1:
+                    # Playlists: each conversion is its own ffmpeg process, so threads
+                    # are enough to keep every core busy encoding
+                    workers = min(len(audio_files), os.cpu_count() or 1)
+                    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                        final_files.extend(executor.map(convert_one, audio_files))
+                else:
+                    final_files.extend(map(convert_one, audio_files))
                 
                 logging.info(f"MP3 conversion completed for {download_id}")
             else:
                 # For non-MP3 downloads or when FFmpeg is working, add all files normally
-                for file_path in downloads_dir.iterdir():
-                    if file_path.is_file():
-                        final_files.append(file_path)
+                with os.scandir(downloads_dir) as entries:
+                    final_files.extend(Path(entry.path) for entry in entries if entry.is_file())
             
             # Add final files to user's list
-            logging.info(f"Processing {len(final_files)} final files for user downloads")
+            logging.debug(f"Processing {len(final_files)} final files for user downloads")
+            file_infos = []
             for file_path in final_files:
-                if file_path.exists():
-                    file_info = {
-                        'name': file_path.name,
-                        'size': file_path.stat().st_size,
-                        'modified': file_path.stat().st_mtime,
-                        'user_id': user_id
-                    }
-                    # Avoid duplicates
-                    if not any(f['name'] == file_info['name'] for f in user_downloads[user_id]):
-                        user_downloads[user_id].append(file_info)
-                        logging.info(f"Added file to user downloads: {file_path.name}")
-                    else:
-                        logging.info(f"File already exists in user downloads: {file_path.name}")
-                else:
+                try:
+                    stat = file_path.stat()
+                except FileNotFoundError:
                     logging.warning(f"File does not exist: {file_path}")
-            
-            # Final delay to ensure all file operations are complete
-            import time
-            time.sleep(0.5)
+                    continue
+                file_infos.append({
+                    'name': file_path.name,
+                    'size': stat.st_size,
+                    'modified': stat.st_mtime,
+                    'user_id': user_id
+                })
+            new_names = add_user_files(user_id, file_infos)
+            for file_info in file_infos:
+                if file_info['name'] in new_names:
+                    logging.debug(f"Added file to user downloads: {file_info['name']}")
+                else:
+                    logging.debug(f"Updated existing file in user downloads: {file_info['name']}")
             
             # Now set the final status after all files have been processed
-            download_progress[download_id] = {
+            update_progress(download_id, {
                 'status': 'finished',
                 'message': 'Download completed successfully!'
-            }
-            logging.info(f"Set final status to finished for {download_id} after processing {len(final_files)} files")
+            })
+            logging.debug(f"Set final status to finished for {download_id} after processing {len(final_files)} files")
                         
         except Exception as conv_error:
             logging.error(f"Error in post-processing: {conv_error}")
-            download_progress[download_id] = {
+            update_progress(download_id, {
                 'status': 'error',
                 'error': f'Post-processing failed: {str(conv_error)}'
-            }
+            })
         
-        logging.info(f"Download {download_id} completed successfully - files in user list: {len(user_downloads.get(user_id, []))}")
+        logging.info(f"Download {download_id} completed successfully - files in user list: {len(user_downloads.get(user_id, {}))}")
             
     except Exception as e:
         logging.error(f"Download {download_id} failed: {str(e)}")
-        download_progress[download_id] = {
+        update_progress(download_id, {
             'status': 'error',
             'error': str(e)
-        }
-    finally:
-        # Always mark download as finished in resource manager
-        if resource_manager:
-            resource_manager.finish_download(user_id)
+        })
+
+if celery is not None:
+    @celery.task(name='app.download_video')
+    def download_video_task(url, format_type, download_id, user_id):
+        try:
+            download_video(url, format_type, download_id, user_id)
+        finally:
+            release_celery_download_slot(user_id)
+
+PROGRESS_NO_CACHE_HEADERS = (
+    ('Cache-Control', 'no-cache, no-store, must-revalidate'),
+    ('Pragma', 'no-cache'),
+    ('Expires', '0'),
+)
+
+@functools.lru_cache(maxsize=256)
+def encode_progress(progress_items):
+    """JSON body for a progress state; pollers see the same few states over and over"""
+    return dumps_json(dict(progress_items))
 
 @app.route('/progress/<download_id>')
 def get_progress(download_id):
-    # Clean up old progress data periodically
-    cleanup_old_progress()
-    
-    progress = download_progress.get(download_id, {'status': 'not_found'})
+    progress = get_download_progress(download_id) or {'status': 'not_found'}
     
     # Only log if it's not a repeated 'not_found' to reduce log spam
     if progress['status'] != 'not_found':
-        logging.info(f"Progress requested for {download_id}: {progress}")
+        logging.debug("Progress requested for %s: %s", download_id, progress)
+    
+    try:
+        body = encode_progress(tuple(progress.items()))
+    except TypeError:
+        body = dumps_json(progress)  # unhashable value (e.g. a list); encode directly
     
-    response = jsonify(progress)
     # Add headers to prevent caching
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
+    return app.response_class(body, mimetype='application/json', headers=PROGRESS_NO_CACHE_HEADERS)
+
+SSE_HEARTBEAT_INTERVAL = 15  # seconds
+
+@app.route('/progress-stream/<download_id>')
+def stream_progress(download_id):
+    """Push progress updates as Server-Sent Events instead of client polling"""
+    progress_queue = progress_queues.get(download_id)
     
-    return response
+    def generate():
+        # Drop updates queued before we connected; the replay below already covers them,
+        # and sending them afterwards would move the client's progress backwards
+        if progress_queue is not None:
+            while True:
+                try:
+                    progress_queue.get_nowait()
+                except queue.Empty:
+                    break
+        
+        # Replay the current state so a late subscriber doesn't wait for the next update
+        progress = get_download_progress(download_id) or {'status': 'not_found'}
+        yield f"data: {dumps_json(progress)}\n\n"
+        if progress['status'] in ('finished', 'error', 'not_found'):
+            return
+        last_progress = progress
+        last_sent = time.monotonic()
+        
+        while True:
+            if progress_queue is not None:
+                try:
+                    progress = progress_queue.get(timeout=SSE_HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    progress = None
+            else:
+                # Running in another process/host: watch the shared state instead
+                time.sleep(1)
+                progress = get_download_progress(download_id) or {'status': 'not_found'}
+                if progress == last_progress:
+                    progress = None
+            
+            if progress is None:
+                # Comment line keeps proxies and the browser from timing out a quiet stream
+                if time.monotonic() - last_sent >= SSE_HEARTBEAT_INTERVAL:
+                    yield ": keepalive\n\n"
+                    last_sent = time.monotonic()
+                continue
+            
+            yield f"data: {dumps_json(progress)}\n\n"
+            last_progress = progress
+            last_sent = time.monotonic()
+            if progress['status'] in ('finished', 'error', 'not_found'):
+                break
+        
+        progress_queues.pop(download_id, None)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache, no-store, must-revalidate, private',
+            'Pragma': 'no-cache',
+            'Expires': '0',
+            'Connection': 'keep-alive',
+            'X-Accel-Buffering': 'no'  # Disable Nginx buffering
+        }
+    )
 
 @app.route('/downloads')
 def list_downloads():
     # Ensure user has session
     if 'user_id' not in session:
         session['user_id'] = str(uuid.uuid4())
-        user_downloads[session['user_id']] = []
         logging.info(f"Downloads endpoint: Created new session with user_id: {session['user_id']}")
     
     user_id = session['user_id']
-    logging.info(f"========== DOWNLOADS ENDPOINT DEBUG ===========")
-    logging.info(f"Downloads endpoint: Listing downloads for user_id: {user_id}")
-    logging.info(f"Downloads endpoint: Available user_downloads keys: {list(user_downloads.keys())}")
-    logging.info(f"Downloads endpoint: Files in memory for this user: {user_downloads.get(user_id, 'NOT_FOUND')}")
-    logging.info(f"Downloads endpoint: Request headers: {dict(request.headers)}")
-    logging.info(f"Downloads endpoint: Session data: {dict(session)}")
-    
-    # Get user's downloads from memory first
-    if user_id in user_downloads:
-        files = user_downloads[user_id].copy()
-    else:
-        files = []
-        user_downloads[user_id] = []
-    
-    # Also check user's directory for any files, but filter out intermediate files
-    user_downloads_dir = Path('downloads') / user_id
-    logging.info(f"Downloads endpoint: Checking directory: {user_downloads_dir}")
-    logging.info(f"Downloads endpoint: Directory exists: {user_downloads_dir.exists()}")
-    
-    if user_downloads_dir.exists():
-        all_files_on_disk = list(user_downloads_dir.iterdir())
-        logging.info(f"Downloads endpoint: All files on disk: {[f.name for f in all_files_on_disk if f.is_file()]}")
-        
-        for file_path in user_downloads_dir.iterdir():
-            if file_path.is_file():
-                logging.info(f"Downloads endpoint: Processing file: {file_path.name}")
-                # Skip webm/m4a files if an MP3 version exists (they're intermediate files)
-                if file_path.suffix.lower() in ['.webm', '.m4a', '.ogg']:
-                    mp3_version = file_path.with_suffix('.mp3')
-                    if mp3_version.exists():
-                        logging.info(f"Skipping {file_path.name} because MP3 version exists")
-                        continue
-                
-                file_info = {
-                    'name': file_path.name,
-                    'size': file_path.stat().st_size,
-                    'modified': file_path.stat().st_mtime
-                }
-                logging.info(f"Downloads endpoint: Adding file to list: {file_info}")
-                # Avoid duplicates
-                if not any(f['name'] == file_info['name'] for f in files):
-                    files.append(file_info)
-                    logging.info(f"Downloads endpoint: File added successfully")
-                else:
-                    logging.info(f"Downloads endpoint: File already exists in list, skipping")
+    logging.debug(f"Downloads endpoint: Listing downloads for user_id: {user_id}")
+    
+    # The in-memory index is kept current by download_video, so the directory
+    # is only walked the first time a user is seen (e.g. after a restart)
+    file_count = len(get_user_files(user_id))
+    try:
+        dir_mtime = os.stat(DOWNLOADS_ROOT / user_id).st_mtime_ns
+    except FileNotFoundError:
+        dir_mtime = 0
     
-    # Sort by modification time (newest first)
-    files.sort(key=lambda x: x['modified'], reverse=True)
+    # Only re-sort and re-serialize when the directory or the index changed
+    cache_key = (dir_mtime, file_count, user_downloads_generation.get(user_id, 0))
+    body, etag = render_downloads_listing(user_id, cache_key)
     
-    logging.info(f"Returning {len(files)} files for user {user_id}: {[f['name'] for f in files]}")
-    return jsonify(files)
+    logging.info(f"Returning {file_count} files for user {user_id}")
+    # Pollers that send If-None-Match get an empty 304 while nothing has changed
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @app.route('/download-file/<filename>')
 def download_file(filename):
@@ -1003,13 +1975,29 @@ def download_file(filename):
         return jsonify({'error': 'Unauthorized'}), 401
     
     user_id = session['user_id']
-    user_downloads_dir = Path('downloads') / user_id
-    file_path = user_downloads_dir / filename
+    user_downloads_dir = DOWNLOADS_ROOT / user_id
+    # safe_join rejects '..' and absolute names that would escape the user's folder
+    safe_path = safe_join(str(user_downloads_dir), filename)
+    if safe_path is None:
+        return jsonify({'error': 'File not found'}), 404
+    file_path = Path(safe_path)
     
-    if not file_path.exists():
+    if not file_path.is_file():
         return jsonify({'error': 'File not found'}), 404
     
-    return send_file(str(file_path), as_attachment=True)
+    # Behind nginx, hand the transfer off so it's served with sendfile(2)
+    # and the worker is freed immediately (see the /internal/ location in nginx.conf)
+    if X_ACCEL_DOWNLOADS:
+        response = Response(mimetype='application/octet-stream')
+        response.headers['X-Accel-Redirect'] = f"/internal/{user_id}/{quote(filename)}"
+        response.headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(filename)}"
+        return response
+    
+    # conditional=True answers Range/If-Modified-Since/If-None-Match requests
+    # from the ETag and Last-Modified headers without re-sending the whole file
+    response = send_file(str(file_path), as_attachment=True, conditional=True, etag=True)
+    response.cache_control.private = True  # per-user files must not be cached by shared proxies
+    return response
 
 @app.route('/sensevoice-status')
 def sensevoice_status():
@@ -1117,7 +2105,7 @@ def transcribe_url_poll():
                 'error': None,
                 'complete': False
             }
-            download_progress[f'transcribe_{session_id}'] = transcription_progress
+            update_progress(f'transcribe_{session_id}', transcription_progress)
             
             try:
                 logging.info(f"Starting polling transcription for session {session_id}")
@@ -1127,37 +2115,9 @@ def transcribe_url_poll():
                 # but collect results instead of yielding them
                 
                 # Extract video info
-                ydl_opts = {'quiet': True, 'no_warnings': True}
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-                    video_title = info.get('title', 'Unknown')
-                    duration = info.get('duration', 0)
-                
-                # Get best audio stream
-                formats = info.get('formats', [])
-                audio_formats = [f for f in formats if f.get('acodec') != 'none' and f.get('vcodec') == 'none']
-                
-                if not audio_formats:
-                    audio_formats = [f for f in formats if f.get('acodec') != 'none']
-                
-                if not audio_formats:
+                video_title, duration, best_audio = get_transcribe_stream(url)
+                if not best_audio.get('url'):
                     raise Exception('No audio stream found')
-                
-                # Sort by audio quality (handle None values properly)
-                def get_sort_key(x):
-                    abr = x.get('abr') or 0
-                    asr = x.get('asr') or 0
-                    filesize = x.get('filesize')
-                    # Handle None filesize
-                    if filesize is None:
-                        filesize_score = 0
-                    else:
-                        filesize_score = -filesize
-                    return (abr, asr, filesize_score)
-                
-                audio_formats.sort(key=get_sort_key, reverse=True)
-                
-                best_audio = audio_formats[0]
                 audio_url = best_audio['url']
                 
                 # Define languages that SenseVoice handles well
@@ -1180,7 +2140,8 @@ def transcribe_url_poll():
                     '-'
                 ]
                 
-                process = subprocess.Popen(
+                process = CachedAudioDecode(
+                    url,
                     ffmpeg_cmd,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,  # Capture stderr for debugging
@@ -1191,7 +2152,6 @@ def transcribe_url_poll():
                 chunk_count = 0
                 total_transcript = []
                 detected_language = None
-                audio_buffer = np.array([], dtype=np.float32)
                 
                 # Initialize variables for language detection
                 use_language = language if language != 'auto' else None
@@ -1200,9 +2160,9 @@ def transcribe_url_poll():
                 # Initialize Whisper if available for auto detection
                 if language == 'auto' and WHISPER_AVAILABLE:
                     try:
-                        # Use pre-loaded model if available, otherwise create new one
-                        whisper_transcriber = PRELOADED_WHISPER if PRELOADED_WHISPER else WhisperTranscriber(model_size="small")
-                        logging.info(f"Using {'pre-loaded' if PRELOADED_WHISPER else 'new'} Whisper 'small' model for language detection")
+                        # Shared model, loaded once per process
+                        whisper_transcriber = get_whisper_transcriber()
+                        logging.info("Using shared Whisper 'small' model for language detection")
                     except Exception as e:
                         logging.warning(f"Failed to initialize Whisper: {e}")
                         use_language = 'zh'  # Fallback to Chinese for SenseVoice
@@ -1244,7 +2204,6 @@ def transcribe_url_poll():
 
                     # Stream audio data from ffmpeg in chunks instead of reading all at once
                     logging.info("Streaming audio from ffmpeg in chunks for polling...")
-                    audio_buffer = b''
                     audio_array_buffer = np.array([], dtype=np.float32)
                     bytes_read = 0  # Initialize bytes_read counter
                     
@@ -1300,9 +2259,10 @@ def transcribe_url_poll():
                         # No ideal pause found, return the target position
                         return min(start_pos + int(normal_chunk_seconds * sample_rate), len(audio))
                     
+                    chunk_reader = prefetch_pipe_reads(process.stdout, read_chunk_size)
                     while True:
                         # Read audio data in smaller chunks for responsiveness
-                        chunk_bytes = process.stdout.read(read_chunk_size)
+                        chunk_bytes = next(chunk_reader, b'')
                         
                         if not chunk_bytes:
                             # Process any remaining buffer
@@ -1327,7 +2287,7 @@ def transcribe_url_poll():
                                 
                                 # Transcribe the chunk
                                 if detected_language and detected_language not in sensevoice_optimal_languages and whisper_transcriber:
-                                    result = whisper_transcriber.transcribe(process_chunk, language=detected_language)
+                                    result = whisper_transcriber.transcribe(process_chunk, language=detected_language, vad_filter=True)
                                     model_used = 'whisper'
                                 else:
                                     result = transcribe_with_sensevoice_from_array(
@@ -1359,16 +2319,15 @@ def transcribe_url_poll():
                                             transcription_progress['chunks'].append(text)
                                             # Force update to ensure visibility
                                             progress_key = f'transcribe_{session_id}'
-                                            download_progress[progress_key] = transcription_progress
+                                            update_progress(progress_key, transcription_progress)
                                             logging.info(f"Final chunk transcribed: {len(text)} chars")
                             break
                         
                         # Add to buffer
-                        audio_buffer += chunk_bytes
                         bytes_read += len(chunk_bytes)
                         
                         # Convert new bytes to array and append to buffer
-                        new_audio = np.frombuffer(chunk_bytes, dtype=np.int16).astype(np.float32) / 32768.0
+                        new_audio = pcm16_to_float32(chunk_bytes)
                         audio_array_buffer = np.concatenate([audio_array_buffer, new_audio])
                         
                         # Determine target chunk size
@@ -1426,7 +2385,7 @@ def transcribe_url_poll():
                             transcription_timed_out = False
                             try:
                                 if detected_language and detected_language not in sensevoice_optimal_languages and whisper_transcriber:
-                                    result = whisper_transcriber.transcribe(process_chunk, language=detected_language)
+                                    result = whisper_transcriber.transcribe(process_chunk, language=detected_language, vad_filter=True)
                                     model_used = 'whisper'
                                 else:
                                     result = transcribe_with_sensevoice_from_array(
@@ -1462,7 +2421,7 @@ def transcribe_url_poll():
                                         transcription_progress['chunks'].append(text)
                                         # Force update to ensure visibility
                                         progress_key = f'transcribe_{session_id}'
-                                        download_progress[progress_key] = transcription_progress
+                                        update_progress(progress_key, transcription_progress)
                                         logging.info(f"Chunk {chunk_count} transcribed: {len(text)} chars, Model: {model_used}")
                         
                     # Set final result
@@ -1470,6 +2429,7 @@ def transcribe_url_poll():
                     transcription_progress['final_transcript'] = final_transcript
                     transcription_progress['complete'] = True
                     transcription_progress['status'] = 'completed'
+                    update_progress(f'transcribe_{session_id}', transcription_progress)
                     logging.info(f"Polling transcription successfully completed for session {session_id}. Total chunks: {chunk_count}")
 
                 except Exception as e:
@@ -1481,6 +2441,10 @@ def transcribe_url_poll():
                 transcription_progress['error'] = str(e)
                 transcription_progress['complete'] = True
                 transcription_progress['status'] = 'error'
+                update_progress(f'transcribe_{session_id}', transcription_progress)
+        
+        # Lets /transcribe-progress long-poll instead of being hit every 2 seconds
+        progress_queues[f'transcribe_{session_id}'] = queue.Queue(maxsize=100)
         
         # Start background thread
         import threading
@@ -1494,16 +2458,68 @@ def transcribe_url_poll():
         logging.error(f"Error starting polling transcription: {e}")
         return jsonify({'error': str(e)}), 500
 
+TRANSCRIBE_LONG_POLL_MAX = 25  # seconds; stays under common proxy idle timeouts
+TRANSCRIBE_SHARED_POLL_INTERVAL = 1  # seconds between Redis reads when another worker runs the job
+
+def read_transcribe_progress(progress_key):
+    """Transcription progress from this worker, or from Redis if another worker runs it"""
+    progress = download_progress.get(progress_key)
+    if progress is None and redis_client is not None:
+        try:
+            raw = redis_client.get(f'prog:{progress_key}')
+            if raw:
+                progress = json.loads(raw)
+        except Exception as e:
+            logging.warning(f"Failed to read shared progress for {progress_key}: {e}")
+    return progress
+
 @app.route('/transcribe-progress/<session_id>')
 def get_transcribe_progress(session_id):
-    """Get transcription progress for polling"""
+    """Get transcription progress for polling.
+    
+    With ?wait=N (capped at TRANSCRIBE_LONG_POLL_MAX seconds) the request is held
+    until the transcription reports something new, so clients can poll again
+    straight away instead of on a fixed interval.
+    """
     progress_key = f'transcribe_{session_id}'
-    progress = download_progress.get(progress_key, {'status': 'not_found'})
+    wait = min(request.args.get('wait', 0, type=float), TRANSCRIBE_LONG_POLL_MAX)
+    progress_queue = progress_queues.get(progress_key)
+    progress = None
+    if wait > 0 and progress_queue is None and redis_client is not None:
+        # Another worker runs this transcription; watch its copy in Redis
+        progress = read_transcribe_progress(progress_key)
+        deadline = time.time() + wait
+        while not (progress or {}).get('complete') and time.time() < deadline:
+            time.sleep(TRANSCRIBE_SHARED_POLL_INTERVAL)
+            latest = read_transcribe_progress(progress_key)
+            if latest != progress:
+                progress = latest
+                break
+    elif wait > 0 and progress_queue is not None:
+        # Anything queued since the last poll means there's news already
+        drained = False
+        while True:
+            try:
+                progress_queue.get_nowait()
+                drained = True
+            except queue.Empty:
+                break
+        if not drained and not download_progress.get(progress_key, {}).get('complete'):
+            try:
+                progress_queue.get(timeout=wait)
+            except queue.Empty:
+                pass
+    
+    if progress is None:
+        progress = read_transcribe_progress(progress_key)
+    
+    # Copy so the timestamp isn't written into the transcription's own dict
+    progress = dict(progress or {'status': 'not_found'})
     
     # Add timestamp to prevent caching
     progress['timestamp'] = time.time()
     
-    response = jsonify(progress)
+    response = fast_jsonify(progress)
     # Add headers to prevent any caching
     response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate, private'
     response.headers['Pragma'] = 'no-cache'
@@ -1533,11 +2549,18 @@ def transcribe_url():
         # Ensure user has session
         if 'user_id' not in session:
             session['user_id'] = str(uuid.uuid4())
-            user_downloads[session['user_id']] = []
         
         user_id = session['user_id']
         logging.info(f"Starting optimized URL transcription for user {user_id}: {url}")
         
+        # The language picks the model, so it is the only other input to the result
+        cache_key = transcript_cache_key(metadata_cache_key(url), language, 'transcribe-url')
+        if not streaming:
+            cached = get_cached_transcript(cache_key)
+            if cached is not None:
+                logging.info(f"Returning cached transcript for {url}")
+                return jsonify(cached)
+        
         # Check if SenseVoice is available
         if not SENSEVOICE_AVAILABLE:
             return jsonify({
@@ -1555,17 +2578,17 @@ def transcribe_url():
             # If streaming is requested, return SSE
             if streaming:
                 def generate_whisper_streaming_response():
-                    import json
                     try:
-                        for chunk in transcribe_from_url_streaming_whisper_generator(url, language, PRELOADED_WHISPER):
-                            yield f"data: {json.dumps(chunk)}\n\n"
+                        chunks = transcribe_from_url_streaming_whisper_generator(url, language, get_whisper_transcriber())
+                        for chunk in iterate_in_background(chunks):
+                            yield f"data: {dumps_json(chunk)}\n\n"
                     except Exception as e:
                         error_data = {
                             'success': False,
                             'error': str(e),
                             'final': True
                         }
-                        yield f"data: {json.dumps(error_data)}\n\n"
+                        yield f"data: {dumps_json(error_data)}\n\n"
                 
                 from flask import Response
                 return Response(
@@ -1582,9 +2605,10 @@ def transcribe_url():
                 )
             else:
                 # Non-streaming mode - still use streaming internally to avoid download
-                result = transcribe_from_url_with_whisper(url, language, streaming=True, preloaded_transcriber=PRELOADED_WHISPER)
+                result = transcribe_from_url_with_whisper(url, language, streaming=True, preloaded_transcriber=get_whisper_transcriber())
                 
                 if result.get('success'):
+                    store_transcript(cache_key, result)
                     return jsonify(result)
                 else:
                     # Fallback to SenseVoice if Whisper fails
@@ -1598,49 +2622,14 @@ def transcribe_url():
             }), 400
         
         # Extract direct audio stream URL from YouTube
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': False,
-        }
-        
         logging.info(f"Extracting audio stream URL from: {url}")
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            video_title = info.get('title', 'Unknown')
-            duration = info.get('duration', 0)
-            
-            # Find best audio format (prefer higher quality for transcription)
-            best_audio = None
-            audio_formats = []
-            
-            # Collect all audio-only formats
-            for fmt in info.get('formats', []):
-                if fmt.get('acodec') != 'none' and fmt.get('vcodec') == 'none':
-                    audio_formats.append(fmt)
-            
-            # Sort by audio bitrate (higher is better) for quality
-            audio_formats.sort(key=lambda f: f.get('abr', 0) or 0, reverse=True)
-            
-            # Try to find best quality format (prefer m4a/mp4 for compatibility, then opus/webm)
-            for codec_preference in ['mp4a', 'm4a', 'opus', 'vorbis']:
-                for fmt in audio_formats:
-                    if codec_preference in fmt.get('acodec', ''):
-                        best_audio = fmt
-                        break
-                if best_audio:
-                    break
-            
-            # If no preferred codec found, just use highest bitrate
-            if not best_audio and audio_formats:
-                best_audio = audio_formats[0]
-            
-            if not best_audio:
-                return jsonify({'error': 'No audio stream found'}), 400
-            
-            audio_url = best_audio['url']
-            logging.info(f"Found audio stream: {best_audio.get('acodec')} at {best_audio.get('abr', 'unknown')} kbps")
+        video_title, duration, best_audio = get_transcribe_stream(url)
+        if not best_audio.get('url'):
+            return jsonify({'error': 'No audio stream found'}), 400
+        
+        audio_url = best_audio['url']
+        logging.info(f"Found audio stream: {best_audio.get('acodec')} at {best_audio.get('abr', 'unknown')} kbps")
         
         # Use ffmpeg to stream directly to SenseVoice
         import subprocess
@@ -1665,9 +2654,8 @@ def transcribe_url():
             is_railway = os.environ.get('RAILWAY_ENVIRONMENT') is not None
             
             def generate_streaming_response():
-                import json
-                
-                process = subprocess.Popen(
+                process = CachedAudioDecode(
+                    url,
                     ffmpeg_cmd,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE  # Capture stderr to prevent blocking
@@ -1681,7 +2669,6 @@ def transcribe_url():
                 total_transcript = []
                 detected_language = None
                 language_detected = False
-                audio_buffer = np.array([], dtype=np.float32)
                 
                 # Initialize variables for language detection
                 use_language = language if language != 'auto' else None
@@ -1691,9 +2678,9 @@ def transcribe_url():
                 # Initialize Whisper if available for auto detection
                 if language == 'auto' and WHISPER_AVAILABLE:
                     try:
-                        # Use pre-loaded model if available, otherwise create new one
-                        whisper_transcriber = PRELOADED_WHISPER if PRELOADED_WHISPER else WhisperTranscriber(model_size="small")
-                        logging.info(f"Using {'pre-loaded' if PRELOADED_WHISPER else 'new'} Whisper 'small' model for language detection")
+                        # Shared model, loaded once per process
+                        whisper_transcriber = get_whisper_transcriber()
+                        logging.info("Using shared Whisper 'small' model for language detection")
                     except Exception as e:
                         logging.warning(f"Failed to initialize Whisper: {e}")
                         use_language = 'zh'  # Fallback to Chinese for SenseVoice
@@ -1746,7 +2733,6 @@ def transcribe_url():
 
                     # Stream audio data from ffmpeg with smart chunking
                     logging.info("Streaming audio from ffmpeg with natural pause detection...")
-                    audio_buffer = b''
                     audio_array_buffer = np.array([], dtype=np.float32)
                     
                     # Adaptive chunk sizes based on language detection needs
@@ -1816,9 +2802,10 @@ def transcribe_url():
                     bytes_read = 0
                     last_process_pos = 0
                     
+                    chunk_reader = prefetch_pipe_reads(process.stdout, read_chunk_size)
                     while True:
                         # Read audio data in smaller chunks for responsiveness
-                        chunk_bytes = process.stdout.read(read_chunk_size)
+                        chunk_bytes = next(chunk_reader, b'')
                         
                         if not chunk_bytes:
                             # Process any remaining buffer
@@ -1841,7 +2828,7 @@ def transcribe_url():
                                 
                                 # Process the final chunk
                                 if detected_language and detected_language not in sensevoice_optimal_languages and whisper_transcriber:
-                                    result = whisper_transcriber.transcribe(audio_array_buffer, language=detected_language)
+                                    result = whisper_transcriber.transcribe(audio_array_buffer, language=detected_language, vad_filter=True)
                                     model_used = 'whisper'
                                 else:
                                     result = transcribe_with_sensevoice_from_array(
@@ -1864,15 +2851,14 @@ def transcribe_url():
                                             'language': detected_language,
                                             'final': False
                                         }
-                                        yield f"data: {json.dumps(chunk_data)}\n\n"
+                                        yield f"data: {dumps_json(chunk_data)}\n\n"
                             break
                         
                         # Add to buffer
-                        audio_buffer += chunk_bytes
                         bytes_read += len(chunk_bytes)
                         
                         # Convert new bytes to array and append to buffer
-                        new_audio = np.frombuffer(chunk_bytes, dtype=np.int16).astype(np.float32) / 32768.0
+                        new_audio = pcm16_to_float32(chunk_bytes)
                         audio_array_buffer = np.concatenate([audio_array_buffer, new_audio])
                         
                         # Determine target chunk size
@@ -1930,7 +2916,7 @@ def transcribe_url():
                             
                             # Use appropriate transcription based on language
                             if detected_language and detected_language not in sensevoice_optimal_languages and whisper_transcriber:
-                                result = whisper_transcriber.transcribe(process_chunk, language=detected_language)
+                                result = whisper_transcriber.transcribe(process_chunk, language=detected_language, vad_filter=True)
                                 model_used = 'whisper'
                             else:
                                 result = transcribe_with_sensevoice_from_array(
@@ -1954,7 +2940,7 @@ def transcribe_url():
                                         'language': detected_language,
                                         'final': False
                                     }
-                                    yield f"data: {json.dumps(chunk_data)}\n\n"
+                                    yield f"data: {dumps_json(chunk_data)}\n\n"
 
                     # Send final result after all segments processed
                     final_data = {
@@ -1967,7 +2953,7 @@ def transcribe_url():
                         'chunks_processed': chunk_count,
                         'final': True
                     }
-                    yield f"data: {json.dumps(final_data)}\n\n"
+                    yield f"data: {dumps_json(final_data)}\n\n"
 
                 except Exception as e:
                     process.terminate()
@@ -1976,7 +2962,7 @@ def transcribe_url():
                         'error': f'Streaming error: {str(e)}',
                         'final': True
                     }
-                    yield f"data: {json.dumps(error_data)}\n\n"
+                    yield f"data: {dumps_json(error_data)}\n\n"
             
             from flask import Response
             return Response(
@@ -1995,7 +2981,8 @@ def transcribe_url():
         # Non-streaming mode (original implementation)
         logging.info("Starting ffmpeg streaming process")
         
-        process = subprocess.Popen(
+        process = CachedAudioDecode(
+            url,
             ffmpeg_cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.DEVNULL
@@ -2007,63 +2994,95 @@ def transcribe_url():
         chunk_count = 0
         detected_language = None  # For auto language detection
         
-        # If language is 'auto', we need to detect it from the first chunk
-        # by saving to a temporary file
+        # For auto language detection, default to Chinese since SenseVoice is optimized for Asian languages
         if language == 'auto':
-            logging.info("Language set to 'auto', will detect from first chunk")
+            use_language = 'zh'
+            logging.info("Auto language detection requested, defaulting to Chinese (zh) for SenseVoice")
+        else:
+            use_language = language
         
         try:
-            while True:
-                chunk = process.stdout.read(chunk_size * 2)  # 2 bytes per sample
-                if not chunk:
-                    break
-                
-                # Convert to numpy array
-                audio_chunk = np.frombuffer(chunk, dtype=np.int16).astype(np.float32) / 32768.0
+            chunk_reader = prefetch_pipe_reads(process.stdout, chunk_size * 2)  # 2 bytes per sample
+            overlap = b''  # last TRANSCRIBE_CHUNK_OVERLAP samples of the previous chunk
+            
+            # Chunks don't depend on each other, so transcribe them in batches on
+            # worker threads while ffmpeg keeps decoding, and put the results
+            # back in order once it is done
+            futures = {}  # index of a batch's first chunk -> future of its results
+            batch = []
+            
+            def submit_batch():
+                # Keep at most two batches per worker in memory
+                pending = [future for future in futures.values() if not future.done()]
+                if len(pending) >= 2 * SENSEVOICE_WORKERS:
+                    concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
                 
-                # Transcribe chunk if it's long enough (at least 1 second)
-                if len(audio_chunk) > 16000:
-                    chunk_count += 1
-                    logging.info(f"Transcribing chunk {chunk_count} ({len(audio_chunk)/16000:.1f}s)")
-                    
-                    # For auto language detection, default to Chinese since SenseVoice is optimized for Asian languages
-                    if language == 'auto':
-                        use_language = 'zh'  # Default to Chinese for auto mode
-                        if chunk_count == 1:
-                            logging.info("Auto language detection requested, defaulting to Chinese (zh) for SenseVoice")
-                    else:
-                        use_language = language
+                # Always use the specific language for array transcription
+                futures[chunk_count - len(batch) + 1] = executor.submit(
+                    transcribe_with_sensevoice_batch_from_array,
+                    audio_arrays=list(batch),
+                    sample_rate=16000,
+                    language=use_language,
+                    model_name='SenseVoiceSmall'
+                )
+                batch.clear()
+            
+            with concurrent.futures.ThreadPoolExecutor(max_workers=SENSEVOICE_WORKERS) as executor:
+                while True:
+                    chunk = next(chunk_reader, b'')
+                    if not chunk:
+                        break
                     
-                    # Always use the specific language for array transcription
-                    result = transcribe_with_sensevoice_from_array(
-                        audio_array=audio_chunk,
-                        sample_rate=16000,
-                        language=use_language,
-                        model_name='SenseVoiceSmall'
-                    )
+                    # Convert to numpy array, starting with the end of the previous chunk
+                    audio_chunk = pcm16_to_float32(overlap + chunk)
+                    overlap = chunk[-TRANSCRIBE_CHUNK_OVERLAP * 2:]
                     
+                    # Transcribe chunk if it's long enough (at least 1 second)
+                    if len(chunk) > 16000 * 2:
+                        chunk_count += 1
+                        logging.info(f"Queueing chunk {chunk_count} ({len(audio_chunk)/16000:.1f}s)")
+                        batch.append(audio_chunk)
+                        if len(batch) == SENSEVOICE_BATCH_SIZE:
+                            submit_batch()
+                
+                if batch:
+                    submit_batch()
+            
+            failed_chunks = 0
+            for first_index in sorted(futures):
+                for index, result in enumerate(futures[first_index].result(), first_index):
                     if result.get('success') and result.get('text'):
                         # Filter out empty or very short transcripts
                         text = result['text'].strip()
                         if text and len(text) > 1:  # Skip single character results
-                            transcripts.append(text)
-                            logging.info(f"Chunk {chunk_count} transcribed successfully: {len(text)} chars")
+                            transcripts.append((index, text))
+                            logging.info(f"Chunk {index} transcribed successfully: {len(text)} chars")
                         else:
-                            logging.info(f"Chunk {chunk_count} returned empty/short text, skipping")
+                            logging.info(f"Chunk {index} returned empty/short text, skipping")
                     else:
-                        logging.warning(f"Chunk {chunk_count} transcription failed: {result.get('error')}")
+                        failed_chunks += 1
+                        logging.warning(f"Chunk {index} transcription failed: {result.get('error')}")
             
             process.wait()
             
             if process.returncode != 0:
                 logging.warning(f"FFmpeg process ended with return code: {process.returncode}")
             
-            # Combine all transcripts
-            full_transcript = ' '.join(transcripts)
+            # Combine all transcripts, dropping the repeated overlap between neighbouring chunks
+            full_transcript = ''
+            previous_index = None
+            for index, text in transcripts:
+                if previous_index is None:
+                    full_transcript = text
+                elif index == previous_index + 1:
+                    full_transcript = merge_overlapping_transcripts(full_transcript, text)
+                else:
+                    full_transcript = f'{full_transcript} {text}'
+                previous_index = index
             
             logging.info(f"Transcription completed: {chunk_count} chunks processed")
             
-            return jsonify({
+            result = {
                 'success': True,
                 'transcript': full_transcript,
                 'model': 'SenseVoice',
@@ -2071,7 +3090,11 @@ def transcribe_url():
                 'duration': duration,
                 'title': video_title,
                 'chunks_processed': chunk_count
-            })
+            }
+            # Only cache complete transcripts; a failed chunk or decode may succeed on retry
+            if process.returncode == 0 and not failed_chunks and full_transcript:
+                store_transcript(cache_key, result)
+            return jsonify(result)
             
         except Exception as e:
             process.terminate()
@@ -2117,7 +3140,7 @@ def transcribe_audio():
             }), 400
         
         user_id = session['user_id']
-        user_downloads_dir = Path('downloads') / user_id
+        user_downloads_dir = DOWNLOADS_ROOT / user_id
         audio_file_path = user_downloads_dir / filename
         
         # Check if file exists
@@ -2140,18 +3163,17 @@ def transcribe_audio():
             # Return streaming response
             def generate_streaming_response():
                 try:
-                    for chunk in transcribe_with_sensevoice_streaming(str(audio_file_path), language, model_name):
+                    chunks = transcribe_with_sensevoice_streaming(str(audio_file_path), language, model_name)
+                    for chunk in iterate_in_background(chunks):
                         # Convert to JSON string for SSE
-                        import json
-                        yield f"data: {json.dumps(chunk)}\n\n"
+                        yield f"data: {dumps_json(chunk)}\n\n"
                 except Exception as e:
                     error_chunk = {
                         'success': False,
                         'error': f'Streaming transcription error: {str(e)}',
                         'final': True
                     }
-                    import json
-                    yield f"data: {json.dumps(error_chunk)}\n\n"
+                    yield f"data: {dumps_json(error_chunk)}\n\n"
             
             from flask import Response
             return Response(
@@ -2168,8 +3190,18 @@ def transcribe_audio():
             )
         else:
             # Non-streaming transcription (legacy support)
+            # Keyed on size and mtime too, since a re-download can replace the file
+            stat = audio_file_path.stat()
+            cache_key = transcript_cache_key(f'{audio_file_path}:{stat.st_size}:{stat.st_mtime_ns}', language, model_name)
+            result = get_cached_transcript(cache_key)
+            if result is not None:
+                logging.info(f"Returning cached transcript for {filename}")
+                return jsonify(result)
+            
             result = transcribe_with_sensevoice(str(audio_file_path), language, model_name)
             logging.info(f"📝 Transcription completed: success={result.get('success', False)}")
+            if result.get('success'):
+                store_transcript(cache_key, result)
             return jsonify(result)
         
     except Exception as e:
@@ -2180,6 +3212,8 @@ def transcribe_audio():
         }), 500
 
 if __name__ == '__main__':
+    # Local development only - production runs `gunicorn -c gunicorn.conf.py app:app`
+    # (gevent workers), see Procfile and DEPLOYMENT.md
     import os
     try:
         # Models are already being loaded in background at module level (lines 86-100)
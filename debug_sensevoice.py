@@ -41,16 +41,13 @@ def test_sensevoice():
     try:
         # Method 1: Direct FunASR usage
         print("\n=== Method 1: Direct FunASR Test ===")
-        from funasr import AutoModel
+        from sensevoice_transcription import sense_voice_transcriber
         
+        # Load through the wrapper's cache so Method 2 reuses the same model
         print("Loading model...")
-        model = AutoModel(
-            model="iic/SenseVoiceSmall",
-            trust_remote_code=True,
-            device="cpu",
-            disable_update=True,
-            disable_log=False
-        )
+        model = sense_voice_transcriber.get_model("SenseVoiceSmall")
+        if model is None:
+            raise RuntimeError("SenseVoiceSmall failed to load")
         
         print("Starting transcription...")
         start_time = time.time()
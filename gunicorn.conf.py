@@ -1,3 +1,16 @@
-workers = 1
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+
+# gevent workers keep SSE progress streams and /progress polling from
+# blocking downloads. Every worker loads its own copy of the Whisper and
+# SenseVoice models, so run one unless WEB_CONCURRENCY asks for more; more
+# than one also needs REDIS_URL, since progress and file lists otherwise live
+# in process memory.
+worker_class = 'gevent'
+worker_connections = 1000
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+
 timeout = 300
 max_requests = 1000
+max_requests_jitter = 50
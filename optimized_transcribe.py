@@ -75,7 +75,7 @@ def transcribe_url_optimized():
                     break
                 
                 # Convert to numpy array
-                audio_chunk = np.frombuffer(chunk, dtype=np.int16).astype(np.float32) / 32768.0
+                audio_chunk = np.multiply(np.frombuffer(chunk, dtype=np.int16), np.float32(1 / 32768), dtype=np.float32)
                 
                 # Transcribe chunk with SenseVoice
                 if len(audio_chunk) > 16000:  # At least 1 second
@@ -161,7 +161,7 @@ def handle_transcribe_stream(data):
                 break
             
             # Convert and transcribe
-            audio_chunk = np.frombuffer(chunk, dtype=np.int16).astype(np.float32) / 32768.0
+            audio_chunk = np.multiply(np.frombuffer(chunk, dtype=np.int16), np.float32(1 / 32768), dtype=np.float32)
             
             if len(audio_chunk) > 16000:
                 # Transcribe (using appropriate model)
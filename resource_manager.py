@@ -2,6 +2,8 @@ import os
 import time
 import logging
 import threading
+import contextlib
+import concurrent.futures
 from pathlib import Path
 from datetime import datetime, timedelta
 import shutil
@@ -10,12 +12,20 @@ import psutil
 class ResourceManager:
     def __init__(self, app):
         self.app = app
-        self.downloads_dir = Path('downloads')
+        self.downloads_dir = Path(os.environ.get('DOWNLOADS_DIR', 'downloads')).resolve()
         self.max_file_age_hours = 24  # Files older than 24 hours will be deleted
         self.max_disk_usage_gb = 5  # Maximum total disk usage in GB
         self.max_concurrent_downloads = 3  # Maximum concurrent downloads per user
+        self.max_downloads_per_minute = 10  # Maximum download requests per user per minute
         self.cleanup_interval = 1800  # Run cleanup every 30 minutes
+        self.cleanup_workers = 8  # User directories cleaned up in parallel
         self.user_concurrent_downloads = {}  # Track concurrent downloads per user
+        self.user_download_times = {}  # Recent download request times per user
+        self.downloads_lock = threading.Lock()  # /download handlers and pool callbacks run concurrently
+        self.disk_usage_cache_seconds = 30  # /download checks disk usage on every request
+        self._downloads_size_cache = (0, 0)  # (computed_at, bytes)
+        self._downloads_size_lock = threading.Lock()
+        self._downloads_size_refreshing = threading.Event()  # a background walk is running
         
         # Start background cleanup thread
         self.cleanup_thread = threading.Thread(target=self._background_cleanup, daemon=True)
@@ -25,40 +35,100 @@ class ResourceManager:
     
     def can_start_download(self, user_id):
         """Check if user can start a new download"""
-        current_downloads = self.user_concurrent_downloads.get(user_id, 0)
+        with self.downloads_lock:
+            current_downloads = self.user_concurrent_downloads.get(user_id, 0)
         if current_downloads >= self.max_concurrent_downloads:
             logging.warning(f"User {user_id} exceeded concurrent download limit ({current_downloads}/{self.max_concurrent_downloads})")
             return False
         return True
     
+    def check_rate_limit(self, user_id):
+        """Record a download request; returns False if the user made too many in the last minute"""
+        now = time.time()
+        with self.downloads_lock:
+            recent = [t for t in self.user_download_times.get(user_id, []) if now - t < 60]
+            if len(recent) >= self.max_downloads_per_minute:
+                self.user_download_times[user_id] = recent
+                logging.warning(f"User {user_id} exceeded download rate limit ({len(recent)}/{self.max_downloads_per_minute} per minute)")
+                return False
+            recent.append(now)
+            self.user_download_times[user_id] = recent
+        return True
+    
     def start_download(self, user_id):
         """Mark start of download for user"""
-        if user_id not in self.user_concurrent_downloads:
-            self.user_concurrent_downloads[user_id] = 0
-        self.user_concurrent_downloads[user_id] += 1
-        logging.info(f"User {user_id} started download. Current: {self.user_concurrent_downloads[user_id]}")
+        with self.downloads_lock:
+            self.user_concurrent_downloads[user_id] = self.user_concurrent_downloads.get(user_id, 0) + 1
+            current = self.user_concurrent_downloads[user_id]
+        logging.info(f"User {user_id} started download. Current: {current}")
     
     def finish_download(self, user_id):
         """Mark end of download for user"""
-        if user_id in self.user_concurrent_downloads:
-            self.user_concurrent_downloads[user_id] = max(0, self.user_concurrent_downloads[user_id] - 1)
-            if self.user_concurrent_downloads[user_id] == 0:
+        with self.downloads_lock:
+            if user_id not in self.user_concurrent_downloads:
+                return
+            # Counts only change under the lock and entries are dropped at zero, so this stays >= 0
+            remaining = self.user_concurrent_downloads[user_id] - 1
+            if remaining:
+                self.user_concurrent_downloads[user_id] = remaining
+            else:
                 del self.user_concurrent_downloads[user_id]
-            logging.info(f"User {user_id} finished download. Remaining: {self.user_concurrent_downloads.get(user_id, 0)}")
+        logging.info(f"User {user_id} finished download. Remaining: {remaining}")
+    
+    def _directory_size(self, path):
+        """Total size of files under path; scandir supplies file types without extra stat calls"""
+        total_size = 0
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            total_size += self._directory_size(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            total_size += entry.stat(follow_symlinks=False).st_size
+                    except (OSError, FileNotFoundError):
+                        pass
+        except (OSError, FileNotFoundError):
+            pass
+        return total_size
+    
+    def _refresh_downloads_size(self):
+        """Walk the downloads directory and store its size as the new baseline"""
+        try:
+            total_size = self._directory_size(self.downloads_dir)
+            with self._downloads_size_lock:
+                self._downloads_size_cache = (time.time(), total_size)
+            return total_size
+        finally:
+            self._downloads_size_refreshing.clear()
+    
+    def adjust_downloads_size(self, delta):
+        """Apply a known change (e.g. bytes freed by cleanup) to the cached size until the next walk"""
+        with self._downloads_size_lock:
+            computed_at, total_size = self._downloads_size_cache
+            self._downloads_size_cache = (computed_at, max(0, total_size + delta))
+    
+    def get_downloads_size(self):
+        """Size of the downloads directory in bytes.
+        
+        Only the first call walks the tree inline. After that the cached size
+        is returned right away, and once it is older than
+        disk_usage_cache_seconds a background thread walks the tree again.
+        """
+        computed_at, total_size = self._downloads_size_cache
+        if computed_at == 0:
+            self._downloads_size_refreshing.set()
+            return self._refresh_downloads_size()
+        if time.time() - computed_at > self.disk_usage_cache_seconds and not self._downloads_size_refreshing.is_set():
+            self._downloads_size_refreshing.set()
+            threading.Thread(target=self._refresh_downloads_size, daemon=True).start()
+        return total_size
     
     def check_disk_space(self):
         """Check if we have enough disk space"""
         try:
             # Get total size of downloads directory
-            total_size = 0
-            if self.downloads_dir.exists():
-                for dirpath, dirnames, filenames in os.walk(self.downloads_dir):
-                    for filename in filenames:
-                        filepath = os.path.join(dirpath, filename)
-                        try:
-                            total_size += os.path.getsize(filepath)
-                        except (OSError, FileNotFoundError):
-                            pass
+            total_size = self.get_downloads_size()
             
             size_gb = total_size / (1024**3)
             if size_gb > self.max_disk_usage_gb:
@@ -90,11 +160,12 @@ class ResourceManager:
         try:
             # Get all files with their timestamps
             files_with_time = []
-            for file_path in user_dir.iterdir():
-                if file_path.is_file():
+            with os.scandir(user_dir) as entries:
+                for entry in entries:
                     try:
-                        stat = file_path.stat()
-                        files_with_time.append((file_path, stat.st_mtime, stat.st_size))
+                        if entry.is_file(follow_symlinks=False):
+                            stat = entry.stat(follow_symlinks=False)
+                            files_with_time.append((Path(entry.path), stat.st_mtime, stat.st_size))
                     except (OSError, FileNotFoundError):
                         pass
             
@@ -134,46 +205,68 @@ class ResourceManager:
         
         except Exception as e:
             logging.error(f"Error cleaning up files for user {user_id}: {e}")
+        
+        if total_size_removed:
+            self.adjust_downloads_size(-total_size_removed)
     
     def cleanup_all_users(self):
         """Clean up files for all users"""
         if not self.downloads_dir.exists():
             return
         
-        for user_dir in self.downloads_dir.iterdir():
-            if user_dir.is_dir():
-                self.cleanup_user_files(user_dir.name)
+        with os.scandir(self.downloads_dir) as entries:
+            user_ids = [entry.name for entry in entries if entry.is_dir(follow_symlinks=False)]
+        
+        # User directories are independent and the work is mostly waiting on the disk
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.cleanup_workers) as executor:
+            list(executor.map(self.cleanup_user_files, user_ids))
     
-    def cleanup_memory(self, download_progress, user_downloads, progress_timestamps):
+    def cleanup_memory(self, download_progress, user_downloads, progress_timestamps, user_downloads_lock=None, progress_lock=None):
         """Clean up old data from memory"""
         current_time = time.time()
         old_threshold = 3600  # 1 hour
         
         # Clean up old progress data
-        old_downloads = []
-        for download_id, timestamp in progress_timestamps.items():
-            if current_time - timestamp > old_threshold:
-                old_downloads.append(download_id)
-        
-        for download_id in old_downloads:
-            download_progress.pop(download_id, None)
-            progress_timestamps.pop(download_id, None)
+        with progress_lock or contextlib.nullcontext():
+            old_downloads = [download_id for download_id, timestamp in progress_timestamps.items()
+                             if current_time - timestamp > old_threshold]
+            for download_id in old_downloads:
+                download_progress.pop(download_id, None)
+                progress_timestamps.pop(download_id, None)
         
         if old_downloads:
             logging.info(f"Cleaned up {len(old_downloads)} old download progress entries")
         
-        # Clean up user downloads data for users with no files
-        empty_users = []
-        for user_id, files in user_downloads.items():
-            user_dir = self.downloads_dir / user_id
-            if not user_dir.exists() or not any(user_dir.iterdir()):
-                empty_users.append(user_id)
+        # Forget rate-limit history for users with no requests in the last minute
+        with self.downloads_lock:
+            for user_id, times in list(self.user_download_times.items()):
+                if not times or current_time - times[-1] >= 60:
+                    del self.user_download_times[user_id]
         
-        for user_id in empty_users:
-            user_downloads.pop(user_id, None)
+        # Clean up user downloads data for users with no files, and drop
+        # index entries for files removed by cleanup_user_files. Hold the
+        # app's index lock so this doesn't race with add_user_files.
+        empty_users = []
+        stale_entries = 0
+        with user_downloads_lock or contextlib.nullcontext():
+            for user_id, files in list(user_downloads.items()):
+                user_dir = self.downloads_dir / user_id
+                if not user_dir.exists() or not any(user_dir.iterdir()):
+                    empty_users.append(user_id)
+                    continue
+                
+                names_on_disk = set(os.listdir(user_dir))
+                for name in [name for name in files if name not in names_on_disk]:
+                    files.pop(name, None)
+                    stale_entries += 1
+            
+            for user_id in empty_users:
+                user_downloads.pop(user_id, None)
         
         if empty_users:
             logging.info(f"Cleaned up {len(empty_users)} empty user download entries")
+        if stale_entries:
+            logging.info(f"Removed {stale_entries} deleted files from user download index")
     
     def get_system_stats(self):
         """Get current system resource usage"""
@@ -182,15 +275,7 @@ class ResourceManager:
             memory = psutil.virtual_memory()
             
             # Disk usage for downloads directory
-            downloads_size = 0
-            if self.downloads_dir.exists():
-                for dirpath, dirnames, filenames in os.walk(self.downloads_dir):
-                    for filename in filenames:
-                        filepath = os.path.join(dirpath, filename)
-                        try:
-                            downloads_size += os.path.getsize(filepath)
-                        except (OSError, FileNotFoundError):
-                            pass
+            downloads_size = self.get_downloads_size()
             
             return {
                 'memory_percent': memory.percent,
@@ -216,8 +301,9 @@ class ResourceManager:
                 # Get references to app's data structures
                 with self.app.app_context():
                     # Import here to avoid circular imports
-                    from app import download_progress, user_downloads, progress_timestamps
-                    self.cleanup_memory(download_progress, user_downloads, progress_timestamps)
+                    from app import download_progress, user_downloads, progress_timestamps, user_downloads_lock, progress_lock
+                    self.cleanup_memory(download_progress, user_downloads, progress_timestamps,
+                                        user_downloads_lock, progress_lock)
                 
                 stats = self.get_system_stats()
                 if stats:
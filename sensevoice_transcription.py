@@ -10,6 +10,7 @@ import os
 os.environ['FUNASR_LOG_LEVEL'] = 'ERROR'
 
 import logging
+import threading
 import time
 import uuid
 from pathlib import Path
@@ -32,6 +33,10 @@ class SenseVoiceTranscriber:
     
     def __init__(self, preloaded_model=None):
         self.models = {}  # Cache multiple models
+        self.model_lock = threading.Lock()  # parallel chunk workers must not load a model twice
+        # FunASR models aren't known to be thread-safe, and each generate() call
+        # already uses all of torch's intra-op threads, so run one at a time
+        self.generate_lock = threading.Lock()
         self.current_model_name = None
         self.is_available = False
         self.rich_transcription_postprocess = None
@@ -111,9 +116,11 @@ class SenseVoiceTranscriber:
     def get_model(self, model_name="SenseVoiceSmall"):
         """Get or load a specific model"""
         if model_name not in self.models:
-            model = self._load_model(model_name)
-            if model is None:
-                return None
+            with self.model_lock:
+                if model_name not in self.models:
+                    model = self._load_model(model_name)
+                    if model is None:
+                        return None
         return self.models[model_name]
     
     def find_speech_segments_from_array(self, audio_array, sample_rate: int = 16000, min_chunk_duration: float = 5.0, max_chunk_duration: float = 15.0, min_silence_duration: float = 0.3) -> List[Tuple[int, int]]:
@@ -361,14 +368,15 @@ class SenseVoiceTranscriber:
                     # Transcribe segment
                     start_time = time.time()
                     
-                    res = model.generate(
-                        input=tmp_path,
-                        cache={},
-                        language=language if language != "auto" else None,
-                        use_itn=True,
-                        batch_size_s=30,
-                        merge_vad=True
-                    )
+                    with self.generate_lock:
+                        res = model.generate(
+                            input=tmp_path,
+                            cache={},
+                            language=language if language != "auto" else None,
+                            use_itn=True,
+                            batch_size_s=30,
+                            merge_vad=True
+                        )
                     
                     elapsed = time.time() - start_time
                     
@@ -479,105 +487,98 @@ class SenseVoiceTranscriber:
         Returns:
             Dictionary with transcription results
         """
+        return self.transcribe_batch_from_array([audio_array], sample_rate, language, model_name)[0]
+    
+    def transcribe_batch_from_array(self, audio_arrays, sample_rate: int = 16000, language: str = "zh", model_name: str = "SenseVoiceSmall") -> List[Dict[str, Any]]:
+        """
+        Transcribe several audio arrays with one batched model call
+        
+        FunASR pads the arrays and runs them through the encoder together, which
+        keeps the hardware busier than one generate() call per array.
+        
+        Args:
+            audio_arrays: List of numpy arrays (float32, normalized to [-1, 1])
+            sample_rate: Sample rate of the audio (default: 16000)
+            language: Language code ("zh", "en", "yue", "ja", "ko") - cannot be "auto" for array input
+            model_name: Model to use for transcription
+            
+        Returns:
+            List of transcription result dictionaries, one per input array
+        """
+        def failed(error):
+            return [{"success": False, "error": error, "text": ""} for _ in audio_arrays]
+        
         if not self.is_available:
-            return {
-                "success": False,
-                "error": "SenseVoice is not available",
-                "text": ""
-            }
+            return failed("SenseVoice is not available")
         
         if language == "auto":
-            return {
-                "success": False,
-                "error": "Language detection not supported for array input. Please specify language explicitly.",
-                "text": ""
-            }
+            return failed("Language detection not supported for array input. Please specify language explicitly.")
         
         try:
             import numpy as np
-            import tempfile
-            import soundfile as sf
             
             # Get or load the model
             model = self.get_model(model_name)
             if model is None:
-                return {
-                    "success": False,
-                    "error": f"Failed to load model: {model_name}",
-                    "text": ""
-                }
+                return failed(f"Failed to load model: {model_name}")
+            
+            inputs = []
+            for audio_array in audio_arrays:
+                # Ensure audio array is float32 and properly normalized
+                if not isinstance(audio_array, np.ndarray):
+                    audio_array = np.array(audio_array, dtype=np.float32)
+                elif audio_array.dtype != np.float32:
+                    audio_array = audio_array.astype(np.float32)
+                
+                # Clip to ensure values are in [-1, 1] range
+                inputs.append(np.clip(audio_array, -1.0, 1.0))
             
-            logger.info(f"🎤 Transcribing audio array")
+            total_duration = sum(len(audio_array) for audio_array in inputs) / sample_rate
+            logger.info(f"🎤 Transcribing {len(inputs)} audio array(s), {total_duration:.2f} seconds in total")
             logger.info(f"📊 Language: {language}")
             logger.info(f"🤖 Model: {model_name}")
-            logger.info(f"🎵 Sample rate: {sample_rate} Hz")
-            logger.info(f"⏱️ Duration: {len(audio_array) / sample_rate:.2f} seconds")
             
-            # Ensure audio array is float32 and properly normalized
-            if not isinstance(audio_array, np.ndarray):
-                audio_array = np.array(audio_array, dtype=np.float32)
-            elif audio_array.dtype != np.float32:
-                audio_array = audio_array.astype(np.float32)
-            
-            # Clip to ensure values are in [-1, 1] range
-            audio_array = np.clip(audio_array, -1.0, 1.0)
+            # FunASR takes the waveforms directly, so there's no need to round-trip
+            # each chunk through a PCM_16 WAV file on disk
+            start_time = time.time()
             
-            # Create temporary WAV file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
-                tmp_path = tmp_file.name
-                # Write audio data to temporary file
-                sf.write(tmp_path, audio_array, sample_rate, subtype='PCM_16')
-            
-            try:
-                # Transcribe using the model
-                start_time = time.time()
-                
+            with self.generate_lock:
                 res = model.generate(
-                    input=tmp_path,
+                    input=inputs if len(inputs) > 1 else inputs[0],
+                    fs=sample_rate,
                     cache={},
                     language=language,
                     use_itn=True,
+                    batch_size=len(inputs),
                     batch_size_s=30,
                     merge_vad=True
                 )
+            
+            elapsed = time.time() - start_time
+            
+            if not res or len(res) < len(inputs):
+                return failed("Model returned empty result")
+            
+            logger.info(f"✅ Transcription completed in {elapsed:.2f}s")
+            
+            results = []
+            for item, audio_array in zip(res, inputs):
+                raw_text = item["text"]
+                results.append({
+                    "success": True,
+                    "text": self.rich_transcription_postprocess(raw_text),
+                    "raw_text": raw_text,
+                    "language": language,
+                    "duration": len(audio_array) / sample_rate,
+                    "processing_time": elapsed
+                })
+            return results
                 
-                elapsed = time.time() - start_time
-                
-                if res and len(res) > 0:
-                    raw_text = res[0]["text"]
-                    processed_text = self.rich_transcription_postprocess(raw_text)
-                    
-                    logger.info(f"✅ Transcription completed in {elapsed:.2f}s")
-                    
-                    return {
-                        "success": True,
-                        "text": processed_text,
-                        "raw_text": raw_text,
-                        "language": language,
-                        "duration": len(audio_array) / sample_rate,
-                        "processing_time": elapsed
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": "Model returned empty result",
-                        "text": ""
-                    }
-                    
-            finally:
-                # Clean up temporary file
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-                    
         except Exception as e:
             logger.error(f"❌ Transcription from array failed: {e}")
             import traceback
             traceback.print_exc()
-            return {
-                "success": False,
-                "error": f"Transcription error: {str(e)}",
-                "text": ""
-            }
+            return failed(f"Transcription error: {str(e)}")
     
     def _format_time(self, seconds: float) -> str:
         """Format time in MM:SS format"""
@@ -662,6 +663,21 @@ def transcribe_with_sensevoice_from_array(audio_array, sample_rate: int = 16000,
     """
     return sense_voice_transcriber.transcribe_from_array(audio_array, sample_rate, language, model_name)
 
+def transcribe_with_sensevoice_batch_from_array(audio_arrays, sample_rate: int = 16000, language: str = "zh", model_name: str = "SenseVoiceSmall") -> List[Dict[str, Any]]:
+    """
+    Convenience function for batched transcription of numpy arrays
+    
+    Args:
+        audio_arrays: List of numpy arrays (float32, normalized to [-1, 1])
+        sample_rate: Sample rate of the audio (default: 16000)
+        language: Language code ("zh", "en", "yue", "ja", "ko") - cannot be "auto" for array input
+        model_name: Model to use for transcription
+        
+    Returns:
+        List of transcription result dictionaries, one per input array
+    """
+    return sense_voice_transcriber.transcribe_batch_from_array(audio_arrays, sample_rate, language, model_name)
+
 def get_sensevoice_status() -> Dict[str, Any]:
     """Get SenseVoice status"""
     return sense_voice_transcriber.get_status()
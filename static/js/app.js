@@ -71,103 +71,138 @@ function monitorProgress(downloadId) {
     const progressFill = document.getElementById('progressFill');
     const progressText = document.getElementById('progressText');
     
-    const checkProgress = async () => {
-        try {
-            const response = await fetch(`/progress/${downloadId}?t=${Date.now()}`);
-            const progress = await response.json();
+    // Render a progress update. Returns the delay (ms) before the next poll,
+    // or 0 once the download has reached a final state.
+    const renderProgress = (progress) => {
+        console.log('Checking progress:', progress);
+        
+        if (progress.status === 'downloading') {
+            // Clean up the progress text to remove any ANSI codes
+            const cleanPercent = cleanProgressText(progress.percent || '0%');
+            const cleanSpeed = cleanProgressText(progress.speed || '');
             
-            console.log('Checking progress:', progress);
+            progressText.textContent = `${window.i18n.downloadingProgress} ${cleanPercent} (${cleanSpeed})`;
+            const percentMatch = cleanPercent.match(/(\d+\.?\d*)%/);
+            if (percentMatch) {
+                progressFill.style.width = percentMatch[1] + '%';
+            }
+            return 1000;
+        } else if (progress.status === 'initializing') {
+            progressText.textContent = window.i18n.initializingDownload;
+            progressFill.style.width = '5%';
+            return 1000;
+        } else if (progress.status === 'preparing') {
+            progressText.textContent = window.i18n.preparingDownload;
+            progressFill.style.width = '15%';
+            return 1000;
+        } else if (progress.status === 'starting') {
+            progressText.textContent = progress.message || window.i18n.startingDownloadMsg;
+            progressFill.style.width = '25%';
+            return 1000;
+        } else if (progress.status === 'processing') {
+            progressText.textContent = progress.message || window.i18n.processingFiles;
+            progressFill.style.width = '85%';
+            return 1000;
+        } else if (progress.status === 'converting') {
+            progressText.textContent = window.i18n.convertingToMP3;
+            progressFill.style.width = '90%';
+            return 2000; // Check less frequently during conversion
+        } else if (progress.status === 'finished') {
+            console.log('Download finished, updating UI and refreshing downloads list');
+            progressFill.style.width = '100%';
+            progressText.textContent = window.i18n.fileReadyForDownload;
             
-            if (progress.status === 'downloading') {
-                // Clean up the progress text to remove any ANSI codes
-                const cleanPercent = cleanProgressText(progress.percent || '0%');
-                const cleanSpeed = cleanProgressText(progress.speed || '');
-                
-                progressText.textContent = `${window.i18n.downloadingProgress} ${cleanPercent} (${cleanSpeed})`;
-                const percentMatch = cleanPercent.match(/(\d+\.?\d*)%/);
-                if (percentMatch) {
-                    progressFill.style.width = percentMatch[1] + '%';
-                }
-                setTimeout(checkProgress, 1000);
-            } else if (progress.status === 'initializing') {
-                progressText.textContent = window.i18n.initializingDownload;
-                progressFill.style.width = '5%';
-                setTimeout(checkProgress, 1000);
-            } else if (progress.status === 'preparing') {
-                progressText.textContent = window.i18n.preparingDownload;
-                progressFill.style.width = '15%';
-                setTimeout(checkProgress, 1000);
-            } else if (progress.status === 'starting') {
-                progressText.textContent = progress.message || window.i18n.startingDownloadMsg;
-                progressFill.style.width = '25%';
-                setTimeout(checkProgress, 1000);
-            } else if (progress.status === 'processing') {
-                progressText.textContent = progress.message || window.i18n.processingFiles;
-                progressFill.style.width = '85%';
-                setTimeout(checkProgress, 1000);
-            } else if (progress.status === 'converting') {
-                progressText.textContent = window.i18n.convertingToMP3;
-                progressFill.style.width = '90%';
-                setTimeout(checkProgress, 2000); // Check less frequently during conversion
-            } else if (progress.status === 'finished') {
-                console.log('Download finished, updating UI and refreshing downloads list');
-                progressFill.style.width = '100%';
-                progressText.textContent = window.i18n.fileReadyForDownload;
-                
-                // Show modern notification for successful download
-                if (window.notifySuccess) {
-                    window.notifySuccess('Download Complete!', window.i18n.fileConvertedReady);
-                } else {
-                    document.getElementById('successMessage').textContent = window.i18n.fileConvertedReady;
-                    document.getElementById('successMessage').style.display = 'block';
-                }
-                resetForm();
-                
-                // Check if Safari - only add delay for Safari
-                const isSafari = /^((?!chrome|android).)*safari/i.test(navigator.userAgent);
-                const initialDelay = isSafari ? 1500 : 1000; // 1.5 second delay for Safari, 1s for others
-                
-                // Refresh downloads list with Safari-specific delay
-                setTimeout(() => {
-                    console.log('Triggering downloads list refresh');
-                    loadDownloads();
-                }, initialDelay);
-                
-                // Follow-up refreshes for both browsers
-                setTimeout(() => {
-                    console.log('Triggering delayed downloads list refresh (2s)');
-                    loadDownloads();
-                }, 2000 + initialDelay);
-                setTimeout(() => {
-                    console.log('Triggering final downloads list refresh (5s)');
-                    loadDownloads();
-                }, 5000 + initialDelay);
-            } else if (progress.status === 'error') {
-                throw new Error(progress.error);
-            } else if (progress.status === 'not_found') {
-                console.log('Download ID not found, stopping progress check');
-                if (window.notifyWarning) {
-                    window.notifyWarning('Session Expired', window.i18n.downloadSessionExpired);
-                } else {
-                    document.getElementById('errorMessage').textContent = window.i18n.downloadSessionExpired;
-                    document.getElementById('errorMessage').style.display = 'block';
-                }
-                resetForm();
+            // Show modern notification for successful download
+            if (window.notifySuccess) {
+                window.notifySuccess('Download Complete!', window.i18n.fileConvertedReady);
             } else {
-                setTimeout(checkProgress, 1000);
+                document.getElementById('successMessage').textContent = window.i18n.fileConvertedReady;
+                document.getElementById('successMessage').style.display = 'block';
             }
-        } catch (error) {
-            if (window.notifyError) {
-                window.notifyError('Download Error', error.message);
+            resetForm();
+            
+            // Check if Safari - only add delay for Safari
+            const isSafari = /^((?!chrome|android).)*safari/i.test(navigator.userAgent);
+            const initialDelay = isSafari ? 1500 : 1000; // 1.5 second delay for Safari, 1s for others
+            
+            // Refresh downloads list with Safari-specific delay
+            setTimeout(() => {
+                console.log('Triggering downloads list refresh');
+                loadDownloads();
+            }, initialDelay);
+            
+            // Follow-up refreshes for both browsers
+            setTimeout(() => {
+                console.log('Triggering delayed downloads list refresh (2s)');
+                loadDownloads();
+            }, 2000 + initialDelay);
+            setTimeout(() => {
+                console.log('Triggering final downloads list refresh (5s)');
+                loadDownloads();
+            }, 5000 + initialDelay);
+            return 0;
+        } else if (progress.status === 'error') {
+            throw new Error(progress.error);
+        } else if (progress.status === 'not_found') {
+            console.log('Download ID not found, stopping progress check');
+            if (window.notifyWarning) {
+                window.notifyWarning('Session Expired', window.i18n.downloadSessionExpired);
             } else {
-                document.getElementById('errorMessage').textContent = error.message;
+                document.getElementById('errorMessage').textContent = window.i18n.downloadSessionExpired;
                 document.getElementById('errorMessage').style.display = 'block';
             }
             resetForm();
+            return 0;
         }
+        return 1000;
     };
     
-    checkProgress();
+    const showProgressError = (error) => {
+        if (window.notifyError) {
+            window.notifyError('Download Error', error.message);
+        } else {
+            document.getElementById('errorMessage').textContent = error.message;
+            document.getElementById('errorMessage').style.display = 'block';
+        }
+        resetForm();
+    };
+    
+    const checkProgress = async () => {
+        try {
+            const response = await fetch(`/progress/${downloadId}?t=${Date.now()}`);
+            const progress = await response.json();
+            
+            const delay = renderProgress(progress);
+            if (delay) {
+                setTimeout(checkProgress, delay);
+            }
+        } catch (error) {
+            showProgressError(error);
+        }
+    };
+    
+    // Prefer server-pushed updates; fall back to polling when SSE is unavailable
+    if (window.EventSource) {
+        const source = new EventSource(`/progress-stream/${downloadId}`);
+        source.onmessage = (event) => {
+            try {
+                if (!renderProgress(JSON.parse(event.data))) {
+                    source.close();
+                }
+            } catch (error) {
+                source.close();
+                showProgressError(error);
+            }
+        };
+        source.onerror = () => {
+            // Stream dropped (proxy without SSE support, worker restart) - resume by polling
+            console.log('Progress stream interrupted, falling back to polling');
+            source.close();
+            checkProgress();
+        };
+    } else {
+        checkProgress();
+    }
 }
 
 function resetForm() {
@@ -200,7 +235,8 @@ async function loadDownloads() {
     try {
         const timestamp = new Date().toISOString();
         console.log(`[${timestamp}] Loading downloads...`);
-        const response = await fetch('/downloads?t=' + Date.now());
+        // Always revalidate, but let the server answer 304 when nothing changed
+        const response = await fetch('/downloads', { cache: 'no-cache' });
         const files = await response.json();
         console.log(`[${timestamp}] Downloads API response:`, files);
         const downloadsList = document.getElementById('downloadsList');
@@ -1381,7 +1381,8 @@ const useSenseVoice = sensevoiceLanguages.includes(selectedLanguage) && this.sen
             
             const pollProgress = async () => {
                 try {
-                    const progressResponse = await fetch(`/transcribe-progress/${session_id}`);
+                    // Long-poll: the server answers as soon as there is new progress
+                    const progressResponse = await fetch(`/transcribe-progress/${session_id}?wait=25`);
                     const progress = await progressResponse.json();
                     
                     console.log('Polling progress:', progress);
@@ -1426,8 +1427,8 @@ const useSenseVoice = sensevoiceLanguages.includes(selectedLanguage) && this.sen
                             resolve(finalTranscript);
                         }
                     } else {
-                        // Continue polling
-                        setTimeout(pollProgress, 2000); // Poll every 2 seconds
+                        // Continue polling; the server already waited for an update
+                        setTimeout(pollProgress, 0);
                     }
                 } catch (error) {
                     console.error('Polling error:', error);
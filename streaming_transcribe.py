@@ -143,7 +143,7 @@ class StreamingTranscriber:
         Transcribe a single audio chunk
         """
         # Convert bytes to numpy array
-        audio_array = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
+        audio_array = np.multiply(np.frombuffer(audio_data, dtype=np.int16), np.float32(1 / 32768), dtype=np.float32)
         
         # Here you would call your transcription model
         # For example, with Whisper:
@@ -14,6 +14,16 @@ import os
 import whisper
 WHISPER_AVAILABLE = True
 
+# faster-whisper runs the same models on CTranslate2, several times faster on CPU
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+
+# WHISPER_BACKEND=openai forces the reference implementation even when faster-whisper is installed
+WHISPER_BACKEND = 'faster' if FASTER_WHISPER_AVAILABLE and os.environ.get('WHISPER_BACKEND', '').lower() != 'openai' else 'openai'
+
 
 
 class WhisperTranscriber:
@@ -31,6 +41,7 @@ class WhisperTranscriber:
         self.use_gpu = use_gpu
         self.model = None
         self.device = None
+        self.backend = WHISPER_BACKEND
         
         if WHISPER_AVAILABLE:
             self._load_model()
@@ -48,7 +59,13 @@ class WhisperTranscriber:
             
             # Check if we should use cached model directory from Docker build
             whisper_cache = os.environ.get('WHISPER_CACHE_DIR')
-            if whisper_cache:
+            if self.backend == 'faster':
+                # int8 on CPU roughly halves memory and speeds decoding again
+                compute_type = "float16" if self.device == "cuda" else "int8"
+                logging.info(f"Loading faster-whisper model '{self.model_size}' on {self.device} ({compute_type})")
+                self.model = WhisperModel(self.model_size, device=self.device, compute_type=compute_type,
+                                          download_root=whisper_cache)
+            elif whisper_cache:
                 logging.info(f"Using Whisper cache directory: {whisper_cache}")
                 # Load model with explicit download_root to use Docker cached models
                 logging.info(f"Loading Whisper model '{self.model_size}' from {whisper_cache} on {self.device}")
@@ -89,10 +106,14 @@ class WhisperTranscriber:
                 audio_segment = np.pad(audio_segment, (0, sample_rate - len(audio_segment)))
             
             # Detect language
-            audio_segment = whisper.pad_or_trim(audio_segment)
-            mel = whisper.log_mel_spectrogram(audio_segment).to(self.device)
-            
-            _, probs = self.model.detect_language(mel)
+            if self.backend == 'faster':
+                # transcribe() detects the language up front; segments decode lazily and are never consumed
+                _, info = self.model.transcribe(audio_segment, beam_size=1)
+                probs = dict(info.all_language_probs or [(info.language, info.language_probability)])
+            else:
+                audio_segment = whisper.pad_or_trim(audio_segment)
+                mel = whisper.log_mel_spectrogram(audio_segment).to(self.device)
+                _, probs = self.model.detect_language(mel)
             detected_lang = max(probs, key=probs.get)
             
             logging.info(f"Detected language: {detected_lang} (confidence: {probs[detected_lang]:.2f})")
@@ -111,7 +132,8 @@ class WhisperTranscriber:
                    audio_array: np.ndarray, 
                    language: Optional[str] = None,
                    sample_rate: int = 16000,
-                   task: str = "transcribe") -> Dict[str, Any]:
+                   task: str = "transcribe",
+                   vad_filter: bool = False) -> Dict[str, Any]:
         """
         Transcribe audio using Whisper
         
@@ -120,6 +142,8 @@ class WhisperTranscriber:
             language: Language code or None for auto-detection
             sample_rate: Sample rate of audio
             task: 'transcribe' or 'translate' (to English)
+            vad_filter: Skip silence (faster-whisper only) and don't condition on
+                previous text, for short streamed chunks
             
         Returns:
             Transcription result with text, language, and segments
@@ -142,11 +166,15 @@ class WhisperTranscriber:
             logging.info(f"Transcribing with Whisper (language: {language}, task: {task})")
             
             # Transcribe
+            if self.backend == 'faster':
+                return self._transcribe_faster(audio_array, language, task, vad_filter)
+            
             result = self.model.transcribe(
                 audio_array,
                 language=language,
                 task=task,
                 fp16=self.device == "cuda",  # Use FP16 on GPU
+                condition_on_previous_text=not vad_filter,
                 verbose=False
             )
             
@@ -165,6 +193,33 @@ class WhisperTranscriber:
                 'error': str(e)
             }
     
+    def _transcribe_faster(self, audio_array: np.ndarray, language: str, task: str, vad_filter: bool = False) -> Dict[str, Any]:
+        """Transcribe with faster-whisper, returning the same shape as the openai-whisper path"""
+        options = {}
+        if vad_filter:
+            # Silero VAD drops silence/music before decoding, so cost scales with speech,
+            # and not conditioning on earlier text stops hallucinations from cascading
+            options = {
+                'vad_filter': True,
+                'vad_parameters': {'min_silence_duration_ms': 500},
+                'condition_on_previous_text': False,
+            }
+        
+        # Greedy decoding, matching openai-whisper's transcribe() default
+        segments, info = self.model.transcribe(audio_array, language=language, task=task, beam_size=1, **options)
+        segments = [
+            {'id': segment.id, 'start': segment.start, 'end': segment.end, 'text': segment.text}
+            for segment in segments
+        ]
+        
+        return {
+            'success': True,
+            'text': ''.join(segment['text'] for segment in segments).strip(),
+            'language': info.language or language,
+            'segments': segments,
+            'model': f'whisper-{self.model_size}'
+        }
+    
     def transcribe_streaming(self,
                            audio_stream: Generator[np.ndarray, None, None],
                            language: Optional[str] = None,
@@ -416,7 +471,7 @@ def transcribe_from_url_streaming_whisper_generator(url: str, language: str = "a
                             logging.info(f"Detected language: {detected_language}")
                         
                         use_language = detected_language if detected_language else language
-                        result = transcriber.transcribe(audio_segment, language=use_language if use_language != 'auto' else None)
+                        result = transcriber.transcribe(audio_segment, language=use_language if use_language != 'auto' else None, vad_filter=True)
                         
                         if result.get('success') and result.get('text'):
                             text = result['text'].strip()
@@ -434,7 +489,7 @@ def transcribe_from_url_streaming_whisper_generator(url: str, language: str = "a
                     break
                 
                 # Convert to numpy array
-                audio_chunk = np.frombuffer(chunk_data, dtype=np.int16).astype(np.float32) / 32768.0
+                audio_chunk = np.multiply(np.frombuffer(chunk_data, dtype=np.int16), np.float32(1 / 32768), dtype=np.float32)  # cast and scale in one pass
                 
                 # Add to buffer
                 audio_buffer.extend(audio_chunk)
@@ -474,7 +529,7 @@ def transcribe_from_url_streaming_whisper_generator(url: str, language: str = "a
                     
                     # Transcribe chunk
                     logging.info(f"Processing segment {chunk_count} ({len(audio_segment)/sample_rate:.1f}s)")
-                    result = transcriber.transcribe(audio_segment, language=use_language if use_language != 'auto' else None)
+                    result = transcriber.transcribe(audio_segment, language=use_language if use_language != 'auto' else None, vad_filter=True)
                     
                     if result.get('success') and result.get('text'):
                         text = result['text'].strip()
@@ -635,7 +690,7 @@ def transcribe_from_url_streaming_whisper(url: str, language: str = "auto", prel
                             logging.info(f"Detected language: {detected_language}")
                         
                         use_language = detected_language if detected_language else language
-                        result = transcriber.transcribe(audio_segment, language=use_language if use_language != 'auto' else None)
+                        result = transcriber.transcribe(audio_segment, language=use_language if use_language != 'auto' else None, vad_filter=True)
                         
                         if result.get('success') and result.get('text'):
                             text = result['text'].strip()
@@ -645,7 +700,7 @@ def transcribe_from_url_streaming_whisper(url: str, language: str = "auto", prel
                     break
                 
                 # Convert to numpy array
-                audio_chunk = np.frombuffer(chunk_data, dtype=np.int16).astype(np.float32) / 32768.0
+                audio_chunk = np.multiply(np.frombuffer(chunk_data, dtype=np.int16), np.float32(1 / 32768), dtype=np.float32)
                 
                 # Add to buffer
                 audio_buffer.extend(audio_chunk)
@@ -685,7 +740,7 @@ def transcribe_from_url_streaming_whisper(url: str, language: str = "auto", prel
                     
                     # Transcribe chunk
                     logging.info(f"Processing segment {chunk_count} ({len(audio_segment)/sample_rate:.1f}s)")
-                    result = transcriber.transcribe(audio_segment, language=use_language if use_language != 'auto' else None)
+                    result = transcriber.transcribe(audio_segment, language=use_language if use_language != 'auto' else None, vad_filter=True)
                     
                     if result.get('success') and result.get('text'):
                         text = result['text'].strip()
@@ -753,6 +808,7 @@ def get_whisper_status() -> Dict[str, Any]:
         return {
             'available': True,
             'models': ['tiny', 'base', 'small', 'medium', 'large'],
+            'backend': WHISPER_BACKEND,
             'gpu_available': torch.cuda.is_available(),
             'device': 'cuda' if torch.cuda.is_available() else 'cpu'
         }